@@ -0,0 +1,186 @@
+import time
+from collections import namedtuple
+from MancalaBoard import MancalaBoard
+from Symmetry import canonical_key
+
+WIN_BONUS = 1000 # Added to the final score difference of finished games, so a proven win beats any heuristic score
+INFINITY = 10 ** 6
+EXACT, LOWER, UPPER = 0, 1, 2
+CHECK_EVERY = 1024 # Nodes between two looks at the clock
+DEFAULT_MAX_NODES = 1_000_000 # Budget of a search called without one, a few seconds of Python
+
+SearchResult = namedtuple("SearchResult", ["best_moves", "score", "depth", "nodes"])
+
+class _BudgetExceeded(Exception):
+    pass
+
+class AlphaBetaSearch:
+    def __init__(self, max_table_entries=1_000_000, tablebase=None):
+        """
+        Iterative-deepening negamax with alpha-beta pruning over the MancalaBoard rules.
+        An extra turn keeps the same side to move, so its child is searched without negating the score or the window.
+        The transposition table maps the packed key of the board's canonical form to (depth, score, bound, best local
+        move), so a position and its side-swapped twin share one entry. It is kept between searches and cleared once it
+        grows past max_table_entries. Positions covered by an EndgameTablebase are scored exactly without searching further.
+        """
+        self.max_table_entries = max_table_entries
+        self.table = {}
+        self.tablebase = tablebase
+        self.nodes = 0
+        self._stack = [MancalaBoard() for _ in range(64)] # One scratch board per ply, so searching allocates nothing
+        self._deadline = None
+        self._max_nodes = None
+        self._budget_active = False
+
+    def search(self, board, q_values=None, time_ms=None, max_nodes=DEFAULT_MAX_NODES, max_depth=60):
+        """
+        Searches the position until the time (milliseconds) or node budget runs out, or max_depth plies are done.
+        The first iteration (depth 1) always completes, so every search returns a score. q_values (6 values, indexed
+        locally) orders the root moves before the first iteration.
+        Returns the moves as local indices (legal ones ranked by search, then the rest), the score of the best move
+        for the side to move, the last completed depth and the node count.
+        """
+        self.nodes = 0
+        self._deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000
+        self._max_nodes = max_nodes
+        if len(self.table) > self.max_table_entries:
+            self.table.clear()
+
+        base = 7 * board.player
+        legal = list(board.legal_moves())
+        if q_values is not None:
+            legal.sort(key=lambda move: q_values[move - base], reverse=True)
+        best_score = self._final_score(board) if not legal else 0
+        depth = 0
+
+        # A forced move is searched as well: its score is the position's value
+        for target in range(1, max_depth + 1 if legal else 1):
+            self._budget_active = target > 1
+            try:
+                scores = self._search_root(board, legal, target)
+            except _BudgetExceeded:
+                break
+            depth = target
+            # Search the best moves of this iteration first in the next one
+            legal.sort(key=lambda move: scores[move], reverse=True)
+            best_score = scores[legal[0]]
+
+        ranked = [move - base for move in legal]
+        rest = [i for i in range(6) if i not in ranked]
+        if q_values is not None:
+            rest.sort(key=lambda i: q_values[i], reverse=True)
+        return SearchResult(ranked + rest, best_score, depth, self.nodes)
+
+    def _search_root(self, board, moves, depth):
+        """Searches every root move to the given depth. Moves that fail low keep their upper bound as score."""
+        scores = {}
+        alpha = -INFINITY
+        child = self._stack[0]
+        for move in moves:
+            child.load(board)
+            extra_turn, _ = child.play(move)
+            if extra_turn:
+                score = self._negamax(child, depth - 1, alpha, INFINITY, 1)
+            else:
+                score = -self._negamax(child, depth - 1, -INFINITY, -alpha, 1)
+            scores[move] = score
+            alpha = max(alpha, score)
+        return scores
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """Returns the score of the position for its side to move."""
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0:
+            self._check_budget()
+
+        if board.side_empty():
+            return self._final_score(board)
+        if self.tablebase is not None and self.tablebase.covers(board):
+            return self._proven(self.tablebase.final_score(board))
+        if depth <= 0 or ply >= len(self._stack):
+            return self._evaluate(board)
+
+        key = canonical_key(board)
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, score, bound, tt_move = entry
+            tt_move += 7 * board.player
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score
+                if bound == LOWER and score >= beta:
+                    return score
+                if bound == UPPER and score <= alpha:
+                    return score
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        child = self._stack[ply]
+        for move in self._ordered_moves(board, tt_move):
+            child.load(board)
+            extra_turn, _ = child.play(move)
+            if extra_turn:
+                score = self._negamax(child, depth - 1, alpha, beta, ply + 1)
+            else:
+                score = -self._negamax(child, depth - 1, -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, best_score, bound, best_move - 7 * board.player)
+        return best_score
+
+    def _ordered_moves(self, board, tt_move):
+        """The table's best move first, then moves ending in the mover's own store (extra turns), then the rest."""
+        p = board.pits
+        store = 6 if board.player == 0 else 13
+        moves = board.legal_moves()
+        first = [move for move in moves if p[move] == store - move]
+        rest = [move for move in moves if p[move] != store - move]
+        ordered = first + rest
+        if tt_move is not None and tt_move in moves:
+            ordered.remove(tt_move)
+            ordered.insert(0, tt_move)
+        return ordered
+
+    @staticmethod
+    def _evaluate(board):
+        """Heuristic score: the difference between the two stores, from the side to move's view."""
+        p = board.pits
+        diff = p[6] - p[13]
+        return diff if board.player == 0 else -diff
+
+    @staticmethod
+    def _final_score(board):
+        """Score of a finished game, where the remaining seeds are swept into their owners' stores."""
+        p = board.pits
+        diff = (p[6] + p[0] + p[1] + p[2] + p[3] + p[4] + p[5]) - (p[13] + p[7] + p[8] + p[9] + p[10] + p[11] + p[12])
+        return AlphaBetaSearch._proven(diff if board.player == 0 else -diff)
+
+    @staticmethod
+    def _proven(diff):
+        """Score of a final store difference that is known exactly."""
+        if diff > 0:
+            return WIN_BONUS + diff
+        if diff < 0:
+            return -WIN_BONUS + diff
+        return 0
+
+    def _check_budget(self):
+        if not self._budget_active:
+            return
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+        if self._max_nodes is not None and self.nodes >= self._max_nodes:
+            raise _BudgetExceeded()
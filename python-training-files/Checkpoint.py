@@ -0,0 +1,125 @@
+import json
+import os
+import random
+import shutil
+import threading
+import numpy as np
+
+LATEST_FILE = "latest"
+
+def _rng_state():
+    """Python's and NumPy's global generator states, as JSON."""
+    version, internal, gauss = random.getstate()
+    name, keys, position, has_gauss, cached = np.random.get_state()
+    return {"random": [version, list(internal), gauss], "numpy": [name, keys.tolist(), position, has_gauss, cached]}
+
+def _set_rng_state(state):
+    version, internal, gauss = state["random"]
+    random.setstate((version, tuple(internal), gauss))
+    name, keys, position, has_gauss, cached = state["numpy"]
+    np.random.set_state((name, np.array(keys, dtype=np.uint32), position, has_gauss, cached))
+
+class Checkpointer:
+    def __init__(self, directory, keep=2):
+        """
+        Saves and restores the whole trainer state under directory: the networks and optimizer, the replay buffer and
+        its priorities, exploration, counters and the random generators. Each checkpoint is its own subdirectory; the
+        "latest" file names the newest complete one and is replaced atomically, so a crash mid-write never leaves a
+        torn checkpoint behind. The replay arrays are plain .npy files, loaded back as copy-on-write memory maps.
+        Only the newest keep checkpoints of this run are kept; other runs' checkpoints in directory are left alone.
+        """
+        self.directory = directory
+        self.keep = keep
+        self._thread = None
+        self.error = None
+        self._written = [] # This run's checkpoints, oldest first: the only ones pruning may delete
+
+    def save(self, agent, trainer_state):
+        """
+        Snapshots the agent (a few milliseconds of array copies) and writes it out on a background thread, so training
+        continues meanwhile. trainer_state holds the training loop's own JSON-serializable counters. A save still running
+        from the previous call is waited for first.
+        """
+        self.wait()
+        weights, arrays, scalars = agent.snapshot()
+        state = {"agent": scalars, "trainer": trainer_state, "rng": _rng_state()}
+        name = f"step-{scalars['training_step']:09d}-episode-{trainer_state.get('episode', 0):09d}"
+        self._thread = threading.Thread(target=self._write, args=(name, weights, arrays, state), name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """Blocks until the save in progress (if any) is on disk. Raises if it failed."""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _write(self, name, weights, arrays, state):
+        try:
+            path = os.path.join(self.directory, name)
+            os.makedirs(path, exist_ok=True)
+            for array_name, array in arrays.items():
+                np.save(os.path.join(path, f"{array_name}.npy"), array)
+            np.savez(os.path.join(path, "weights.npz"), **{
+                f"{group}/{i}": value for group, values in weights.items() for i, value in enumerate(values)
+            })
+            with open(os.path.join(path, "state.json"), "w") as f:
+                json.dump(state, f)
+
+            # Publish the checkpoint, then drop the oldest ones
+            latest = os.path.join(self.directory, LATEST_FILE)
+            with open(latest + ".tmp", "w") as f:
+                f.write(name)
+            os.replace(latest + ".tmp", latest)
+            if name in self._written:
+                self._written.remove(name)
+            self._written.append(name)
+            self._prune()
+        except Exception as e: # Raised in the training thread by the next save() or wait()
+            self.error = e
+
+    def _prune(self):
+        """
+        Deletes this run's checkpoints (and the one it resumed from) beyond the newest keep; the directory may hold
+        another run's, whose step numbers say nothing about which is newer. Pruning only follows a published checkpoint,
+        so the resumed one outlives it until a newer one exists. Its replay arrays may still be mapped: removing a mapped
+        file is safe on POSIX, and where it fails (Windows) the directory is reported and retried at the next save.
+        """
+        failed = []
+        for old in self._written[:-self.keep]:
+            try:
+                shutil.rmtree(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not delete old checkpoint {old}, retrying after the next save: {e}")
+                failed.append(old)
+        self._written = failed + self._written[-self.keep:]
+
+    def load(self, agent):
+        """Restores the newest checkpoint into agent and returns its trainer_state, or None if there is no checkpoint."""
+        try:
+            with open(os.path.join(self.directory, LATEST_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = os.path.join(self.directory, name)
+        with open(os.path.join(path, "state.json")) as f:
+            state = json.load(f)
+
+        # Copy-on-write maps: pages are read lazily and only copied once training writes to them
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c")
+            for name in ("states", "actions", "rewards", "next_states", "dones", "tree")
+        }
+        with np.load(os.path.join(path, "weights.npz")) as saved:
+            weights = {
+                group: [saved[f"{group}/{i}"] for i in range(sum(key.startswith(f"{group}/") for key in saved.files))]
+                for group in ("model", "target_model", "optimizer")
+            }
+        agent.restore(weights, arrays, state["agent"])
+        _set_rng_state(state["rng"])
+        self._written = [name] # The resumed run continues this one, so it is pruned like the run's own
+        return state["trainer"]
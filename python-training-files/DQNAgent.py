@@ -9,6 +9,7 @@ from tensorflow.keras.layers import Dense, Input, Lambda
 from tensorflow.keras.optimizers import Adam                                                # type: ignore
 from tensorflow.keras.utils import register_keras_serializable                              # type: ignore
 from PER.PrioritizedReplayBuffer import PrioritizedReplayBuffer
+from Symmetry import swap_sides
 
 # The register_keras_serializable decorator is used to register the custom Lambda layer with Keras. 
 # This makes it possible to save and load the model without any issues.
@@ -22,12 +23,31 @@ random.seed(42)
 np.random.seed(42)
 tf.random.set_seed(42)
 
+def _inbound_layers(layer_config):
+    """Names of the layers feeding a layer, from a functional model's config (Keras 3 and the older tf.keras format)."""
+    names = []
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get("class_name") == "__keras_tensor__":
+                names.append(node["config"]["keras_history"][0])
+                return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, (list, tuple)):
+            if len(node) >= 3 and isinstance(node[0], str) and isinstance(node[1], int): # [layer, node index, tensor index, ...]
+                names.append(node[0])
+                return
+            for value in node:
+                walk(value)
+    walk(layer_config["inbound_nodes"])
+    return names
+
 class DQNAgent:
     def __init__(self, state_size, action_size, learning_rate=0.001):
         """Initialize the DQN Agent."""
         self.state_size = state_size          # Size of input state
         self.action_size = action_size        # Number of possible actions
-        self.memory = PrioritizedReplayBuffer(capacity=100_000, alpha=0.6)
+        self.memory = PrioritizedReplayBuffer(capacity=100_000, alpha=0.6, state_size=state_size)
         self.gamma = 0.97                   # Discount factor
         self.epsilon = 1.0                  # Initial exploration rate
         self.epsilon_min = 0.01             # Minimum exploration rate
@@ -40,7 +60,10 @@ class DQNAgent:
         self.model = self._build_model(learning_rate)
         self.target_model = self._build_model(learning_rate)
         self._update_target_model()
+        self._build_train_step()
         self.training_step = 0
+        self.last_td_errors = None # TD errors of the latest training batch, for telemetry
+        self.augment_swapped = True         # Also store every transition as seen from the other side
 
     def _build_model(self, lr):
         """Builds a dueling DQN model for Q-learning."""
@@ -71,10 +94,47 @@ class DQNAgent:
         """Updates the target model with the weights of the main model."""
         self.target_model.set_weights(self.model.get_weights())
 
+    def _build_train_step(self):
+        """
+        Compiles one training step into a single graph: online and target Q-values, Bellman targets, the weighted
+        Huber loss, the gradient update and the TD errors. It has to be rebuilt whenever self.model is replaced.
+        """
+        model, target_model = self.model, self.target_model
+        optimizer = model.optimizer
+        optimizer.build(model.trainable_variables)
+        huber = tf.keras.losses.Huber()
+        gamma = self.gamma
+
+        batch = tf.TensorSpec(shape=(None,), dtype=tf.float32)
+        states = tf.TensorSpec(shape=(None, self.state_size), dtype=tf.float32)
+        actions = tf.TensorSpec(shape=(None,), dtype=tf.int32)
+
+        @tf.function(input_signature=[states, actions, batch, states, batch, batch])
+        def train_step(states, actions, rewards, next_states, dones, is_weights):
+            # Target Q-value from the Bellman equation; terminal transitions keep only the reward
+            next_q = target_model(next_states, training=False)
+            target = rewards + gamma * tf.reduce_max(next_q, axis=1) * (1.0 - dones)
+            action_mask = tf.one_hot(actions, self.action_size)
+
+            with tf.GradientTape() as tape:
+                q_values = model(states, training=True)
+                # Only the taken action's Q-value moves towards its target, exactly as fitting on the edited predictions did
+                targets = tf.stop_gradient(q_values * (1.0 - action_mask) + action_mask * target[:, None])
+                loss = huber(targets, q_values, sample_weight=is_weights)
+            gradients = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+
+            return tf.abs(tf.reduce_sum(q_values * action_mask, axis=1) - target)
+
+        self._train_step = train_step
+
     def remember(self, state, action, reward, next_state, done):
-        """Stores experience in memory with priority."""
+        """Stores experience in memory with priority, together with its side-swapped twin if augment_swapped is set."""
         priority = 1.0  # Assign high priority to new samples
         self.memory.store((state, action, reward, next_state, done), priority)
+        if self.augment_swapped:
+            # The same transition from the other chair: same local action, reward and outcome (see Symmetry.py)
+            self.memory.store((swap_sides(state), action, reward, swap_sides(next_state), done), priority)
 
     def act(self, state, actions):
         """
@@ -99,51 +159,117 @@ class DQNAgent:
         ranked = sorted(actions, key=lambda a: act_values[0][a], reverse=True)
         return ranked
 
+    def act_batch(self, states, legal_masks):
+        """
+        Chooses one action (local index) for each of many states with a single forward pass.
+        legal_masks is a (n, action_size) boolean array of legal moves. Each row independently explores with probability
+        epsilon, picking a uniformly random legal move; otherwise it takes the legal move with the highest Q-value.
+        Rows without any legal move get action 0.
+        """
+        states = np.asarray(states, dtype=np.float32)
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        explore = np.random.rand(len(states)) <= self.epsilon
+
+        scores = np.random.rand(*legal_masks.shape) # Random ranking for exploring rows
+        greedy = ~explore
+        if greedy.any(): # Only rows that exploit need the network
+            scores[greedy] = self.model(states[greedy], training=False).numpy()
+        return np.argmax(np.where(legal_masks, scores, -np.inf), axis=1)
+
     def replay(self):
-        """Trains the model using experiences from memory."""
+        """Trains the model using experiences from memory. Returns False if memory does not hold a full batch yet."""
+        if not self.learn():
+            return False
+        self.decay_exploration()
+        return True
+
+    def learn(self):
+        """Runs one training step on a prioritized minibatch. Returns False if memory does not hold a full batch yet."""
 
         # If not enough samples in memory, do nothing
         if self.memory.size() < self.batch_size:
-            return
+            return False
 
-        minibatch, indices, is_weights = self.memory.sample(self.batch_size, beta=self.beta)
-        states = np.array([x[0] for x in minibatch])
-        next_states = np.array([x[3] for x in minibatch])
-        targets = self.model.predict(states, verbose=0)
-        next_q = self.target_model.predict(next_states, verbose=0)
-        
-        errors = np.zeros(self.batch_size)
-
-        # Update target Q-value using the Bellman equation for each sample.
-        for i, (_, a, r, _, done) in enumerate(minibatch):
-            if done:
-                target = r
-            else:
-                target = r + self.gamma * np.max(next_q[i])
-            errors[i] = abs(targets[i][a] - target)
-            targets[i][a] = target
+        (states, actions, rewards, next_states, dones), indices, is_weights = self.memory.sample(self.batch_size, beta=self.beta)
+        errors = self._train_step(
+            tf.constant(states, dtype=tf.float32),
+            tf.constant(actions, dtype=tf.int32),
+            tf.constant(rewards, dtype=tf.float32),
+            tf.constant(next_states, dtype=tf.float32),
+            tf.constant(dones, dtype=tf.float32),
+            tf.constant(is_weights, dtype=tf.float32),
+        )
 
-        # Update the priorities in the replay buffer using the TD errors and update the model.
-        self.memory.update_priorities(indices, errors)
-        self.model.fit(states, targets, batch_size=self.batch_size, sample_weight=is_weights, verbose=0)
+        # Update the priorities in the replay buffer using the TD errors.
+        self.last_td_errors = errors.numpy()
+        self.memory.update_priorities(indices, self.last_td_errors)
 
         # Track training steps and update target model periodically
         self.training_step += 1
         if self.training_step % self.update_target_freq == 0:
             self._update_target_model()
-            print("Target model updated")
-        
-        # Decay epsilon and update beta
+        return True
+
+    def decay_exploration(self):
+        """Decays epsilon and anneals beta, once per training episode."""
         self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
         self.beta = min(self.beta_max, self.beta + self.beta_increment) 
 
+    def snapshot(self):
+        """
+        Returns copies of everything training depends on: both networks, the optimizer's moments, the replay buffer,
+        exploration and the step counter. The copies can be written out while training goes on.
+        """
+        arrays, scalars = self.memory.snapshot()
+        weights = {
+            "model": self.model.get_weights(),
+            "target_model": self.target_model.get_weights(),
+            "optimizer": [variable.numpy() for variable in self.model.optimizer.variables],
+        }
+        scalars.update(epsilon=self.epsilon, beta=self.beta, training_step=self.training_step)
+        return weights, arrays, scalars
+
+    def restore(self, weights, arrays, scalars):
+        """Restores a snapshot() into this agent (same architecture and buffer capacity)."""
+        self.model.set_weights(weights["model"])
+        self.target_model.set_weights(weights["target_model"])
+        for variable, value in zip(self.model.optimizer.variables, weights["optimizer"]):
+            variable.assign(value)
+        self.memory.restore(arrays, scalars)
+        self.epsilon = scalars["epsilon"]
+        self.beta = scalars["beta"]
+        self.training_step = scalars["training_step"]
+
     def save_model(self, name):
         """Saves the model to a file."""
         self.model.save(name)
 
+    def export_weights(self, name):
+        """
+        Saves the network's dense layers (in evaluation order) and its stream structure to an .npz file,
+        so InferenceAgent can run it with NumPy alone.
+        """
+        arrays = {}
+        layers = []
+        # The functional model's config lists every layer with the layers feeding it, through public API only
+        for layer_config in self.model.get_config()["layers"]:
+            layer_name, kind = layer_config["name"], layer_config["class_name"]
+            if kind == "Dense":
+                kernel, bias = self.model.get_layer(layer_name).get_weights()
+                arrays[f"{layer_name}/kernel"] = kernel
+                arrays[f"{layer_name}/bias"] = bias
+                activation = layer_config["config"]["activation"]
+                layers.append(f"{layer_name}|{_inbound_layers(layer_config)[0]}|{activation}")
+            elif kind == "Lambda":
+                arrays["streams"] = np.array(_inbound_layers(layer_config)) # (value, advantage) inputs of _combine_streams
+            else:
+                arrays["input"] = np.array(layer_name)
+        np.savez(name, layers=np.array(layers), **arrays)
+
     def load_model(self, name):
         """Loads a saved model from a file."""
         # Pass custom_objects to help Keras locate the globally defined combine_streams function.
         custom_objects = {"combine_streams": _combine_streams}
         self.model = tf.keras.models.load_model(name, custom_objects=custom_objects)
-        self.target_model = tf.keras.models.load_model(name, custom_objects=custom_objects)
\ No newline at end of file
+        self.target_model = tf.keras.models.load_model(name, custom_objects=custom_objects)
+        self._build_train_step()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+from array import array
+from math import comb
+import numpy as np
+from MancalaBoard import MancalaBoard
+
+# File layout: a fixed header followed by one int8 per pit configuration, in index order. Positions are stored in their
+# canonical form (see Symmetry.py: the side to move in player 1's seat), so a position and its side-swapped twin share a value.
+#   header: magic (8 bytes), version (uint16), max seeds (uint16), completed layers (uint16), padding (uint16)
+# A value is the best achievable difference between the side to move's and the opponent's future store gains,
+# which does not depend on what the stores already hold. Layer n holds every configuration with n seeds in play.
+MAGIC = b"MNCLTBLB"
+VERSION = 2
+HEADER = struct.Struct("<8sHHHH")
+MAX_SUPPORTED_SEEDS = 40 # Keeps every value well inside int8
+PLAY_PITS = (0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12)
+SWAPPED_PITS = (7, 8, 9, 10, 11, 12, 0, 1, 2, 3, 4, 5) # The playing pits in the order of the side-swapped board
+CHUNK_SIZE = 2048
+
+def _tables(max_seeds):
+    """Precomputes layer offsets and the partial sums used to rank a configuration inside its layer."""
+    ways = lambda seeds, pits: comb(seeds + pits - 1, pits - 1) if pits else int(seeds == 0)
+    offsets = [0]
+    for n in range(max_seeds + 1):
+        offsets.append(offsets[-1] + ways(n, 12))
+    # below[r][k][v]: configurations of r seeds over k + 1 pits whose first pit holds fewer than v seeds
+    below = [[[sum(ways(r - u, k) for u in range(v)) for v in range(r + 1)] for k in range(12)] for r in range(max_seeds + 1)]
+    return offsets, below
+
+def seeds_in_play(pits):
+    return sum(pits[i] for i in PLAY_PITS)
+
+def position_index(pits, player, offsets, below):
+    """Index of a position (the 12 playing pits, stores ignored, and the side to move) by its canonical configuration."""
+    order = PLAY_PITS if player == 1 else SWAPPED_PITS
+    remaining = seeds_in_play(pits)
+    rank = 0
+    for j in range(11):
+        v = pits[order[j]]
+        rank += below[remaining][11 - j][v]
+        remaining -= v
+    return offsets[seeds_in_play(pits)] + rank
+
+def compositions(seeds, pits=12):
+    """Yields every way to place seeds into pits, in index order."""
+    if pits == 1:
+        yield (seeds,)
+        return
+    for v in range(seeds + 1):
+        for rest in compositions(seeds - v, pits - 1):
+            yield (v,) + rest
+
+def _potential(config):
+    """Grows with every move that keeps all seeds in play, so solving a layer by descending potential is always safe."""
+    return sum(i % 6 * v for i, v in enumerate(config))
+
+class EndgameTablebase:
+    def __init__(self, path):
+        """
+        Memory-maps a tablebase file built by this module. Only the layers that finished generating are used,
+        so a partially generated file already answers the positions with the fewest seeds.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_seeds, completed, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} endgame tablebase")
+        self._offsets, self._below = _tables(self.max_seeds)
+        if len(self._mm) != HEADER.size + self._offsets[-1]:
+            raise ValueError(f"{path} is truncated")
+        self.values = np.frombuffer(self._mm, dtype=np.int8, offset=HEADER.size)
+        self.max_seeds = completed - 1 # Layers 0 .. completed - 1 are solved
+
+    def covers(self, board):
+        return seeds_in_play(board.pits) <= self.max_seeds
+
+    def value(self, board):
+        """Exact future store-gain difference for the side to move, or None if the position is not covered."""
+        if not self.covers(board):
+            return None
+        return int(self.values[position_index(board.pits, board.player, self._offsets, self._below)])
+
+    def final_score(self, board):
+        """Exact final store difference for the side to move under perfect play, or None if not covered."""
+        value = self.value(board)
+        if value is None:
+            return None
+        p = board.pits
+        return value + (p[6] - p[13] if board.player == 0 else p[13] - p[6])
+
+    def best_moves(self, board):
+        """Ranks the side to move's moves (local indices) by their exact value, illegal moves last; None if not covered."""
+        if not self.covers(board) or board.side_empty():
+            return None
+        base = 7 * board.player
+        scores = {}
+        child = MancalaBoard()
+        for move in board.legal_moves():
+            child.load(board)
+            scores[move - base] = _move_value(child, move, self.values, self._offsets, self._below)
+        ranked = sorted(scores, key=lambda i: scores[i], reverse=True)
+        return ranked + [i for i in range(6) if i not in scores]
+
+    def close(self):
+        self.values = None
+        self._mm.close()
+
+def _move_value(board, move, values, offsets, below):
+    """Plays move on board (in place) and returns its exact value for the mover."""
+    store = 6 if board.player == 0 else 13
+    before = board.pits[store]
+    extra_turn, _ = board.play(move)
+    gain = board.pits[store] - before
+    child_value = int(values[position_index(board.pits, board.player, offsets, below)])
+    return gain + (child_value if extra_turn else -child_value)
+
+def _solve(board, values, offsets, below):
+    """Solves one position whose children are all solved already."""
+    if board.side_empty():
+        # The game ends and the opponent sweeps their remaining seeds
+        return -sum(board.pits[i] for i in PLAY_PITS)
+    best = None
+    child = MancalaBoard()
+    for move in board.legal_moves():
+        child.load(board)
+        value = _move_value(child, move, values, offsets, below)
+        if best is None or value > best:
+            best = value
+    return best
+
+_worker = None
+
+def _init_worker(path, max_seeds):
+    global _worker
+    values = np.memmap(path, dtype=np.int8, mode="r+", offset=HEADER.size)
+    _worker = (values,) + _tables(max_seeds)
+
+def _solve_chunk(configs):
+    """Solves every configuration of the chunk with player 1 (the canonical side) to move and writes them straight into the file."""
+    values, offsets, below = _worker
+    board = MancalaBoard()
+    board.player = 1
+    for config in configs:
+        board.pits[:] = array("H", config[:6] + (0,) + config[6:] + (0,))
+        values[position_index(board.pits, 1, offsets, below)] = _solve(board, values, offsets, below)
+    values.flush()
+
+def generate(path, max_seeds, workers=None):
+    """
+    Builds (or resumes building) the tablebase at path, one layer of seeds in play at a time. Seeds in play never
+    increase, and moves within a layer always raise the potential, so each layer is solved in groups of equal
+    potential, highest first, with every group spread over the process pool. The header records finished layers.
+    """
+    if max_seeds > MAX_SUPPORTED_SEEDS:
+        raise ValueError(f"At most {MAX_SUPPORTED_SEEDS} seeds are supported")
+    offsets, _ = _tables(max_seeds)
+    size = HEADER.size + offsets[-1]
+    completed = 0
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        with open(path, "rb") as f:
+            magic, version, stored_seeds, completed, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or stored_seeds != max_seeds:
+            completed = 0
+    if completed == 0:
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, max_seeds, 0, 0))
+            f.truncate(size)
+    elif completed > max_seeds:
+        print(f"{path} is already complete")
+        return
+
+    with multiprocessing.Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(path, max_seeds)) as pool:
+        for n in range(completed, max_seeds + 1):
+            levels = {}
+            for config in compositions(n):
+                levels.setdefault(_potential(config), []).append(config)
+            for potential in sorted(levels, reverse=True):
+                configs = levels[potential]
+                pool.map(_solve_chunk, [configs[i:i + CHUNK_SIZE] for i in range(0, len(configs), CHUNK_SIZE)])
+            with open(path, "r+b") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, max_seeds, n + 1, 0))
+            print(f"Solved layer {n} ({offsets[n + 1] - offsets[n]} configurations)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrograde-solves every position with at most --seeds seeds in play.")
+    parser.add_argument("--seeds", type=int, default=10, help="Largest number of seeds left in the pits")
+    parser.add_argument("--output", default="public/assets/endgame_tablebase.bin")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    generate(args.output, args.seeds, args.workers)
+    print(f"Endgame tablebase saved to {args.output} ({os.path.getsize(args.output)} bytes)")
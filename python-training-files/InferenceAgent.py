@@ -0,0 +1,93 @@
+import os
+import random
+import numpy as np
+
+MODEL_VARIANTS = ("fp32", "optimized", "int8")
+
+def variant_path(onnx_path, variant):
+    """Path of an exported model variant written by keras_to_onnx.py ("fp32" is the plain export itself)."""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant!r}, expected one of {', '.join(MODEL_VARIANTS)}")
+    if variant == "fp32":
+        return onnx_path
+    root, ext = os.path.splitext(onnx_path)
+    return f"{root}.{variant}{ext}"
+
+class InferenceAgent:
+    def __init__(self, model_path, epsilon=0.0):
+        """
+        Inference-only agent with the same act / act_batch interface as DQNAgent, without importing TensorFlow.
+        model_path is either an ONNX export (run with ONNX Runtime) or an .npz written by DQNAgent.export_weights
+        (run as plain NumPy matmuls).
+        """
+        self.epsilon = epsilon
+        if model_path.endswith(".npz"):
+            self._load_weights(model_path)
+            self.q_values = self._forward_numpy
+        else:
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = 1
+            options.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(model_path, sess_options=options)
+            self._input_name = self._session.get_inputs()[0].name
+            self._output_name = self._session.get_outputs()[0].name
+            self.q_values = self._forward_onnx
+
+    def _load_weights(self, path):
+        """Reads the dense layers (in evaluation order) and the names of the value and advantage streams."""
+        with np.load(path) as weights:
+            self._input = str(weights["input"])
+            self._value, self._advantage = (str(name) for name in weights["streams"])
+            self._layers = []
+            for entry in weights["layers"]:
+                name, source, activation = str(entry).split("|")
+                kernel = weights[f"{name}/kernel"].astype(np.float32)
+                bias = weights[f"{name}/bias"].astype(np.float32)
+                self._layers.append((name, source, activation, kernel, bias))
+
+    def _forward_numpy(self, states):
+        """Runs the dueling network on a (n, 15) batch and returns the (n, 6) Q-values."""
+        outputs = {self._input: np.asarray(states, dtype=np.float32)}
+        for name, source, activation, kernel, bias in self._layers:
+            x = outputs[source] @ kernel + bias
+            if activation == "relu6":
+                x = np.clip(x, 0.0, 6.0, out=x)
+            elif activation == "relu":
+                x = np.maximum(x, 0.0, out=x)
+            outputs[name] = x
+        value, advantage = outputs[self._value], outputs[self._advantage]
+        return value + (advantage - advantage.mean(axis=1, keepdims=True))
+
+    def _forward_onnx(self, states):
+        """Runs the ONNX model on a (n, 15) batch and returns the (n, 6) Q-values."""
+        states = np.asarray(states, dtype=np.float32)
+        return self._session.run([self._output_name], {self._input_name: states})[0]
+
+    def act(self, state, actions):
+        """
+        Returns a list of candidate actions (local indices) sorted by descending Q-value.
+        If epsilon-greedy triggers, simply returns a shuffled version of actions.
+        """
+        if not actions:
+            return []
+
+        if np.random.rand() <= self.epsilon:
+            random.shuffle(actions)
+            return actions
+
+        act_values = self.q_values(np.asarray(state).reshape(1, -1))
+        return sorted(actions, key=lambda a: act_values[0][a], reverse=True)
+
+    def act_batch(self, states, legal_masks):
+        """Chooses one action (local index) per state with a single forward pass, exactly like DQNAgent.act_batch."""
+        states = np.asarray(states, dtype=np.float32)
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        explore = np.random.rand(len(states)) <= self.epsilon
+
+        scores = np.random.rand(*legal_masks.shape) # Random ranking for exploring rows
+        greedy = ~explore
+        if greedy.any(): # Only rows that exploit need the network
+            scores[greedy] = self.q_values(states[greedy])
+        return np.argmax(np.where(legal_masks, scores, -np.inf), axis=1)
@@ -0,0 +1,281 @@
+from VecMancalaEnv import VecMancalaEnv
+from test_agent import SHARD_SIZE
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import numpy as np
+
+LEAGUE_FILE = "league.json"
+MODELS_DIR = "models"
+RANDOM_PLAYER = "random" # Built-in uniform-random player, the league's fixed anchor
+INITIAL_RATING = 1000.0
+RATING_STEP = 0.5 # Share of the way a match moves the rating gap towards the gap its result implies
+MAX_GAP_CHANGE = 200.0
+OPENING_PLIES = 4 # Random moves before the models take over, so greedy players do not replay one game over and over
+SEED = 45
+
+def expected_score(rating, opponent_rating):
+    """Elo expected score (win = 1, tie = 0.5) of a player against an opponent."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+def play_match(policies, games, rng, opening_plies=OPENING_PLIES):
+    """
+    Plays games between two policies (act_batch-style, None for random moves) and returns (wins, losses, ties) for the
+    first one. Every random opening is played twice with the seats swapped, so games is rounded up to an even number.
+    All games run at once, with one inference call per policy per step for every game in which it is to move.
+    """
+    half = (games + 1) // 2
+    openings = VecMancalaEnv(half, auto_reset=False)
+    for _ in range(opening_plies):
+        openings.step(openings.sample_actions(rng))
+
+    env = VecMancalaEnv(2 * half, auto_reset=False)
+    env.boards[:] = np.tile(openings.boards, (2, 1))
+    env.current_player[:] = np.tile(openings.current_player, 2)
+    env.done[:] = np.tile(openings.done, 2)
+    first_seat = np.repeat([0, 1], half) # Seat of the first policy in every game
+
+    while not env.done.all():
+        actions = env.sample_actions(rng) # Random moves for a random player (and pit 0 for games without legal moves)
+        states, masks = env.get_states(), env.legal_mask()
+        first_turn = ~env.done & (env.current_player == first_seat)
+        for policy, turn in ((policies[0], first_turn), (policies[1], ~env.done & ~first_turn)):
+            if policy is not None and turn.any():
+                actions[turn] = policy(states[turn], masks[turn]) + 7 * env.current_player[turn]
+        env.step(actions)
+
+    winners = env.winners()
+    return int(np.sum(winners == first_seat)), int(np.sum(winners == 1 - first_seat)), int(np.sum(winners == -1))
+
+_worker_policies = {}
+
+def _policy(path):
+    """Loads a model once per worker process. Every model plays greedily."""
+    if path is None:
+        return None
+    if path not in _worker_policies:
+        if path.endswith((".onnx", ".npz")): # Inference-only backends, no TensorFlow start-up in the workers
+            from InferenceAgent import InferenceAgent
+            agent = InferenceAgent(path)
+        else:
+            from DQNAgent import DQNAgent
+            agent = DQNAgent(state_size=15, action_size=6)
+            agent.load_model(path)
+            agent.epsilon = 0.0
+        _worker_policies[path] = agent.act_batch
+    return _worker_policies[path]
+
+def _play_shard(first_path, second_path, games, seed_seq):
+    np.random.seed(seed_seq.generate_state(1)[0])
+    return play_match((_policy(first_path), _policy(second_path)), games, np.random.default_rng(seed_seq))
+
+class League:
+    def __init__(self, directory):
+        """
+        A pool of saved models with Elo ratings, kept under directory: the models are copied into models/ and the
+        ratings, per-pair records and round count live in league.json, which is replaced atomically after every round.
+        Ratings are updated incrementally from each round's matches, so adding a model and playing a few rounds ranks
+        it without replaying the matches already rated. The random player is always present with a fixed rating, so
+        ratings stay comparable across rounds (and against test_agent's evaluations).
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, LEAGUE_FILE)
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {"rounds": 0, "players": {}, "records": {}}
+            self._new_player(RANDOM_PLAYER, None, None)
+
+    def _new_player(self, name, play_path, export_path):
+        if name in self.state["players"]:
+            raise ValueError(f"The league already has a player named {name!r}")
+        self.state["players"][name] = {
+            "play": play_path,       # What the match workers load
+            "export": export_path,   # The Keras model keras_to_onnx.py converts, if there is one
+            "rating": INITIAL_RATING,
+            "games": 0, "wins": 0, "losses": 0, "ties": 0,
+            "added": time.time(),
+        }
+
+    def _model_path(self, name, extension):
+        os.makedirs(os.path.join(self.directory, MODELS_DIR), exist_ok=True)
+        return os.path.join(self.directory, MODELS_DIR, f"{name}{extension}")
+
+    def add_model(self, path, name=None):
+        """
+        Copies a saved model (.keras, .onnx or .npz) into the league. A Keras model is also exported to .npz, which the
+        match workers run with NumPy alone.
+        """
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        extension = os.path.splitext(path)[1]
+        if name in self.state["players"]:
+            raise ValueError(f"The league already has a player named {name!r}")
+        copy = self._model_path(name, extension)
+        shutil.copyfile(path, copy)
+        if extension == ".keras":
+            from DQNAgent import DQNAgent
+            agent = DQNAgent(state_size=15, action_size=6)
+            agent.load_model(copy)
+            agent.export_weights(self._model_path(name, ".npz"))
+            self._new_player(name, self._model_path(name, ".npz"), copy)
+        else:
+            self._new_player(name, copy, None)
+        self.save()
+
+    def add_agent(self, agent, name):
+        """Adds an in-memory DQNAgent (e.g. a training snapshot) under name. A resumed run re-adding a name replaces its model."""
+        self.state["players"].pop(name, None)
+        agent.save_model(self._model_path(name, ".keras"))
+        agent.export_weights(self._model_path(name, ".npz"))
+        self._new_player(name, self._model_path(name, ".npz"), self._model_path(name, ".keras"))
+        self.save()
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(self.path + ".tmp", self.path)
+
+    def schedule(self, mode="round-robin", matches=None, rng=None):
+        """
+        Pairs of players for one round. "round-robin" pairs everyone with everyone. "sampled" draws matches distinct
+        pairs, favouring closely rated pairs and players with few games, where a match tells the ratings the most.
+        """
+        if mode not in ("round-robin", "sampled"):
+            raise ValueError(f"Unknown schedule {mode!r}, expected round-robin or sampled")
+        players = self.state["players"]
+        pairs = list(itertools.combinations(sorted(players), 2))
+        if mode == "round-robin" or not pairs:
+            return pairs
+        rng = rng or np.random.default_rng()
+        weights = np.array([
+            expected_score(players[a]["rating"], players[b]["rating"]) * expected_score(players[b]["rating"], players[a]["rating"])
+            / np.sqrt(1 + min(players[a]["games"], players[b]["games"]))
+            for a, b in pairs
+        ])
+        picked = rng.choice(len(pairs), size=min(matches or len(players), len(pairs)), replace=False, p=weights / weights.sum())
+        return [pairs[i] for i in sorted(picked)]
+
+    def play_round(self, mode="round-robin", matches=None, games=200, workers=None, seed=SEED):
+        """
+        Plays one round of matches of games games each, sharded across a process pool, then rates them in schedule
+        order and saves the league. Results depend only on the league's state and seed, never on the worker count.
+        Returns [(first, second, wins, losses, ties)] from the first player's side.
+        """
+        start = time.perf_counter()
+        seed_seq = np.random.SeedSequence([seed, self.state["rounds"]])
+        pairs = self.schedule(mode, matches, np.random.default_rng(seed_seq.spawn(1)[0]))
+        if not pairs:
+            return []
+        players = self.state["players"]
+        jobs = [] # (match index, first model, second model, games, seed)
+        for index, ((first, second), match_seq) in enumerate(zip(pairs, seed_seq.spawn(len(pairs)))):
+            sizes = [SHARD_SIZE] * (games // SHARD_SIZE) + ([games % SHARD_SIZE] if games % SHARD_SIZE else [])
+            for size, shard_seq in zip(sizes, match_seq.spawn(len(sizes))):
+                jobs.append((index, players[first]["play"], players[second]["play"], size, shard_seq))
+
+        workers = min(workers or os.cpu_count(), len(jobs))
+        context = multiprocessing.get_context("spawn") # TensorFlow does not survive a fork
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            shards = list(pool.map(_play_shard, *zip(*[job[1:] for job in jobs])))
+        totals = np.zeros((len(pairs), 3), dtype=np.int64)
+        for (index, *_), result in zip(jobs, shards):
+            totals[index] += result
+
+        results = []
+        for (first, second), (wins, losses, ties) in zip(pairs, totals.tolist()):
+            self._rate(first, second, wins, losses, ties)
+            results.append((first, second, wins, losses, ties))
+        self.state["rounds"] += 1
+        self.save()
+        elapsed = time.perf_counter() - start
+        print(f"Round {self.state['rounds']}: {len(pairs)} matches, {int(totals.sum()):,} games in {elapsed:.1f}s "
+              f"({totals.sum() / elapsed:,.0f} games/s)")
+        return results
+
+    def _rate(self, first, second, wins, losses, ties):
+        """
+        Updates both ratings from one match. A match is hundreds of games, so instead of a fixed K per game (which
+        would overshoot) the rating gap moves RATING_STEP of the way towards the gap at which the match's average score
+        would have been expected: an Elo update with K scaled to the match, capped at MAX_GAP_CHANGE. Against the
+        random player, which never moves, the other player takes the whole change. An empty match changes nothing.
+        """
+        games = wins + losses + ties
+        if not games:
+            return
+        a, b = self.state["players"][first], self.state["players"][second]
+        expected = expected_score(a["rating"], b["rating"])
+        slope = expected * (1 - expected) * np.log(10) / 400 # d(expected score) / d(rating gap)
+        change = RATING_STEP * ((wins + 0.5 * ties) / games - expected) / slope
+        change = float(np.clip(change, -MAX_GAP_CHANGE, MAX_GAP_CHANGE))
+        movers = [name for name in (first, second) if name != RANDOM_PLAYER] # By name: two players' records can be equal
+        for name, player, sign in ((first, a, 1), (second, b, -1)):
+            if name in movers:
+                player["rating"] += sign * change / len(movers)
+        for player, won, lost in ((a, wins, losses), (b, losses, wins)):
+            player["games"] += games
+            player["wins"] += won
+            player["losses"] += lost
+            player["ties"] += ties
+        record = self.state["records"].setdefault(f"{first}|{second}", [0, 0, 0])
+        record[0] += wins
+        record[1] += losses
+        record[2] += ties
+
+    def standings(self):
+        """[(name, player)] from the highest rating down."""
+        return sorted(self.state["players"].items(), key=lambda item: item[1]["rating"], reverse=True)
+
+    def best(self, exportable=True):
+        """The highest-rated (name, player), only among players with a Keras model if exportable. None if there is none."""
+        for name, player in self.standings():
+            if name != RANDOM_PLAYER and (player["export"] or not exportable):
+                return name, player
+        return None
+
+def print_standings(league):
+    print(f"{'Player':<32} {'Elo':>7} {'Games':>8} {'Win rate':>9} {'Ties':>7}")
+    for name, player in league.standings():
+        games = player["games"]
+        print(f"{name:<32} {player['rating']:>7.1f} {games:>8} {player['wins'] / max(games, 1):>9.2%} {player['ties'] / max(games, 1):>7.2%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rates saved models against each other with Elo.")
+    parser.add_argument("--league", default="model_saves/league", help="Directory of the league's models and ratings")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Add saved models (.keras, .onnx or .npz) to the league")
+    add.add_argument("models", nargs="+")
+    add.add_argument("--name", help="Player name (only with a single model; defaults to the file name)")
+    play = commands.add_parser("play", help="Play rounds of rated matches")
+    play.add_argument("--schedule", choices=("round-robin", "sampled"), default="round-robin")
+    play.add_argument("--matches", type=int, help="Matches per sampled round (defaults to the number of players)")
+    play.add_argument("--games", type=int, default=200, help="Games per match, half with each player moving first")
+    play.add_argument("--rounds", type=int, default=1)
+    play.add_argument("--workers", type=int)
+    commands.add_parser("standings", help="Print the ratings")
+    commands.add_parser("best", help="Print the path of the highest-rated Keras model")
+    args = parser.parse_args()
+
+    league = League(args.league)
+    if args.command == "add":
+        if args.name and len(args.models) > 1:
+            parser.error("--name needs a single model")
+        for path in args.models:
+            league.add_model(path, args.name)
+    elif args.command == "play":
+        for _ in range(args.rounds):
+            league.play_round(args.schedule, args.matches, args.games, args.workers)
+        print_standings(league)
+    elif args.command == "standings":
+        print_standings(league)
+    elif args.command == "best":
+        best = league.best()
+        if best is None:
+            parser.exit(1, "The league has no Keras models\n")
+        print(best[1]["export"])
@@ -0,0 +1,209 @@
+import math
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+C_PUCT = 1.5
+PRIOR_TEMPERATURE = 0.5 # In Q-value units: the model's Q-values of one position's moves lie about a point apart
+VALUE_SCALE = 2.0       # Q-value gap (to the root's best Q-value) that maps to a leaf value of tanh(1)
+MATERIAL_SCALE = 3.0    # Store difference that adds as much to the leaf value as VALUE_SCALE of Q-value
+VIRTUAL_LOSS = 1.0
+
+MCTSResult = namedtuple("MCTSResult", ["best_moves", "value", "simulations", "batches"])
+
+class _Node:
+    __slots__ = ("board", "moves", "priors", "children", "visits", "values", "total", "value", "terminal", "pending")
+
+    def __init__(self, board, terminal):
+        """A position in the tree. Edge statistics (visits, summed values) are kept per legal move, for the side to move."""
+        self.board = board
+        self.terminal = terminal # Exact value for the side to move if the game is decided, else None
+        self.moves = None        # Set once the model has evaluated the position
+        self.pending = False
+
+def _sign(diff):
+    return (diff > 0) - (diff < 0)
+
+class MCTSSearch:
+    def __init__(self, evaluator, tablebase=None, batch_size=32, threads=1, c_puct=C_PUCT, material_weight=1.0):
+        """
+        Monte Carlo tree search (PUCT) over the MancalaBoard rules, guided by the dueling network. evaluator maps a
+        (n, 15) float32 batch to the (n, 6) Q-values, e.g. SessionPool.run or InferenceAgent.q_values; positions are
+        fed as the model was trained on them, the side to move's pits where its seat has them. A softmax over the legal moves' Q-values gives the priors,
+        and the best legal Q-value, centred on the root's, gives the leaf value. Since the network's Q-values barely
+        separate positions, the store difference gained since the root is added (weighted by material_weight, 0 for the
+        network alone) before squashing to [-1, 1]. Finished games (and positions an EndgameTablebase covers) are
+        scored exactly as win, loss or tie.
+
+        Leaves are collected batch_size at a time, each descent adding a virtual loss along its path so the next one
+        explores elsewhere, and every batch is one evaluator call. With threads > 1, several batches are in flight at
+        once: one thread walks the tree while the others wait on the evaluator (ONNX Runtime releases the GIL).
+        """
+        self.evaluator = evaluator
+        self.tablebase = tablebase
+        self.batch_size = batch_size
+        self.threads = threads
+        self.c_puct = c_puct
+        self.material_weight = material_weight
+        self._lock = threading.Lock()
+
+    def search(self, board, simulations=800, time_ms=None, q_values=None):
+        """
+        Runs simulations playouts from the position (fewer if the time budget in milliseconds runs out first).
+        q_values (6 values, indexed locally) are the root's, if the caller already has them.
+        Returns the moves as local indices (legal ones by visit count, then the rest), the value of the most visited
+        move for the side to move (-1 to 1), the simulations run and the evaluator calls made.
+        """
+        root = _Node(board.copy(), None)
+        if q_values is None:
+            q_values = self._evaluate([board])[0]
+        q_values = np.asarray(q_values, dtype=np.float64)
+        self._baseline = float(np.max(q_values[self._local_moves(board)])) if not board.side_empty() else 0.0
+        self._root_material = (board.player, self._material(board)) # Leaves count only the stores' change since the root
+        self._deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000
+        self._remaining = simulations
+        self._batches = 0
+        self._errors = []
+        if board.side_empty():
+            return MCTSResult(sorted(range(6), key=lambda i: q_values[i], reverse=True), 0.0, 0, 0)
+        self._expand(root, q_values)
+
+        if len(root.moves) > 1:
+            workers = [threading.Thread(target=self._worker, args=(root,), daemon=True) for _ in range(self.threads - 1)]
+            for worker in workers:
+                worker.start()
+            self._worker(root)
+            for worker in workers:
+                worker.join()
+            if self._errors:
+                raise self._errors[0]
+
+        base = 7 * board.player
+        order = sorted(range(len(root.moves)), key=lambda i: (root.visits[i], root.priors[i]), reverse=True)
+        ranked = [root.moves[i] - base for i in order]
+        rest = sorted((i for i in range(6) if i not in ranked), key=lambda i: q_values[i], reverse=True)
+        best = order[0]
+        value = root.values[best] / root.visits[best] if root.visits[best] else root.value
+        return MCTSResult(ranked + rest, value, simulations - max(self._remaining, 0), self._batches)
+
+    def _worker(self, root):
+        try:
+            while True:
+                with self._lock:
+                    leaves, collisions = self._collect(root)
+                    if not leaves:
+                        if self._remaining <= 0 or self._expired() or not collisions:
+                            return
+                # Every leaf left is being evaluated by another thread: let it finish first
+                if not leaves:
+                    time.sleep(0)
+                    continue
+                q_values = self._evaluate([leaf.board for _, leaf in leaves])
+                with self._lock:
+                    self._batches += 1
+                    for (path, leaf), leaf_q in zip(leaves, q_values):
+                        self._expand(leaf, leaf_q)
+                        leaf.pending = False
+                        self._backup(path, leaf, leaf.value)
+        except Exception as e: # Raised by search() in the calling thread
+            self._errors.append(e)
+            self._remaining = 0
+
+    def _expired(self):
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def _collect(self, root):
+        """Descends up to batch_size times, backing up decided positions at once. Returns the leaves to evaluate."""
+        leaves = []
+        collisions = 0
+        while len(leaves) < self.batch_size and self._remaining > 0 and collisions < self.batch_size and not self._expired():
+            path, leaf = self._select(root)
+            if leaf.terminal is not None:
+                self._remaining -= 1
+                self._backup(path, leaf, leaf.terminal)
+            elif leaf.pending: # Already in this batch or another thread's
+                self._revert(path)
+                collisions += 1
+            else:
+                self._remaining -= 1
+                leaf.pending = True
+                leaves.append((path, leaf))
+        return leaves, collisions
+
+    def _select(self, node):
+        """Follows the highest PUCT score down to a position that is unexpanded or decided, adding virtual losses."""
+        path = []
+        while node.terminal is None and node.moves is not None:
+            sqrt_total = math.sqrt(node.total + 1)
+            best, best_score = 0, -math.inf
+            for i, prior in enumerate(node.priors):
+                visits = node.visits[i]
+                q = node.values[i] / visits if visits else node.value # Unvisited moves start at the position's value
+                score = q + self.c_puct * prior * sqrt_total / (1 + visits)
+                if score > best_score:
+                    best, best_score = i, score
+            node.visits[best] += 1
+            node.values[best] -= VIRTUAL_LOSS
+            node.total += 1
+            path.append((node, best))
+            child = node.children[best]
+            if child is None:
+                child = node.children[best] = self._child(node.board, node.moves[best])
+            node = child
+        return path, node
+
+    def _child(self, board, move):
+        child = board.copy()
+        child.play(move)
+        if child.side_empty():
+            p = child.pits
+            diff = (p[6] + sum(p[0:6])) - (p[13] + sum(p[7:13]))
+            return _Node(child, float(_sign(diff if child.player == 0 else -diff)))
+        if self.tablebase is not None and self.tablebase.covers(child):
+            return _Node(child, float(_sign(self.tablebase.final_score(child))))
+        return _Node(child, None)
+
+    def _backup(self, path, leaf, value):
+        """Adds a value (for the leaf's side to move) along the path, flipping it wherever the side to move changes."""
+        player = leaf.board.player
+        for node, i in reversed(path):
+            if node.board.player != player:
+                value, player = -value, node.board.player
+            node.values[i] += value + VIRTUAL_LOSS # The visit itself was counted on the way down
+
+    @staticmethod
+    def _revert(path):
+        for node, i in path:
+            node.visits[i] -= 1
+            node.values[i] += VIRTUAL_LOSS
+            node.total -= 1
+
+    def _evaluate(self, boards):
+        states = np.array([list(board.pits) + [board.player] for board in boards], dtype=np.float32)
+        return np.asarray(self.evaluator(states), dtype=np.float64)
+
+    @staticmethod
+    def _material(board):
+        """Store difference for the side to move."""
+        p = board.pits
+        return (p[6] - p[13]) if board.player == 0 else (p[13] - p[6])
+
+    @staticmethod
+    def _local_moves(board):
+        return [move - 7 * board.player for move in board.legal_moves()]
+
+    def _expand(self, node, q_values):
+        """Sets the priors and the value of a position from its Q-values (indexed locally)."""
+        node.moves = node.board.legal_moves()
+        legal_q = q_values[self._local_moves(node.board)]
+        best_q = legal_q.max()
+        priors = np.exp((legal_q - best_q) / PRIOR_TEMPERATURE)
+        node.priors = (priors / priors.sum()).tolist()
+        root_player, root_material = self._root_material
+        material = self._material(node.board) - (root_material if node.board.player == root_player else -root_material)
+        node.value = math.tanh((best_q - self._baseline) / VALUE_SCALE + self.material_weight * material / MATERIAL_SCALE)
+        node.children = [None] * len(node.moves)
+        node.visits = [0] * len(node.moves)
+        node.values = [0.0] * len(node.moves)
+        node.total = 0
@@ -0,0 +1,139 @@
+from array import array
+
+INITIAL_PITS = (4,) * 6 + (0,) + (4,) * 6 + (0,)
+TOTAL_SEEDS = sum(INITIAL_PITS)
+STORES = (6, 13)
+
+def _sowing_rings():
+    """For every pit, the 13 pits its seeds are sown into (in order, skipping the opponent's store). Unplayable pits map to ()."""
+    rings = []
+    for action in range(14):
+        if action % 7 == 6:
+            rings.append(())
+            continue
+        opponent_store = STORES[1 - action // 7]
+        ring = []
+        idx = action
+        for _ in range(13):
+            idx = (idx + 1) % 14
+            if idx == opponent_store:
+                idx = (idx + 1) % 14
+            ring.append(idx)
+        rings.append(tuple(ring))
+    return tuple(rings)
+
+RINGS = _sowing_rings()
+# Position of the mover's own store in every ring, so seeds sown into it can be counted without scanning
+STORE_POS = tuple(ring.index(STORES[pit // 7]) if ring else -1 for pit, ring in enumerate(RINGS))
+# Legal moves (as board indices) for every player and every 6-bit mask of non-empty pits, built once
+MOVES = tuple(tuple(tuple(i + 7 * player for i in range(6) if mask >> i & 1) for mask in range(64)) for player in range(2))
+_INITIAL = array("H", INITIAL_PITS)
+ALL_MOVES = (tuple(range(0, 6)), tuple(range(7, 13)))
+
+class MancalaBoard:
+    __slots__ = ("pits", "player")
+
+    def __init__(self, pits=INITIAL_PITS, player=0):
+        """
+        A compact Mancala position: the 14 pits in one unsigned 16-bit array and the side to move.
+        Moves are applied in place, so playing a game allocates nothing beyond the board itself.
+        """
+        self.pits = array("H", pits)
+        self.player = player
+
+    def reset(self):
+        """Returns the board to the starting position in place."""
+        self.pits[:] = _INITIAL
+        self.player = 0
+
+    @classmethod
+    def from_state(cls, state):
+        """Builds a board from a 15-value state (14 pits followed by the side to move)."""
+        return cls((int(v) for v in state[:14]), int(state[14]))
+
+    def copy(self):
+        board = MancalaBoard.__new__(MancalaBoard)
+        board.pits = array("H", self.pits)
+        board.player = self.player
+        return board
+
+    def load(self, other):
+        """Overwrites this board with another one without allocating."""
+        self.pits[:] = other.pits
+        self.player = other.player
+
+    def key(self):
+        """Packs the position into a single integer (pits as 16-bit words, side to move in the lowest bit)."""
+        return int.from_bytes(self.pits, "little") << 1 | self.player
+
+    def legal_mask(self):
+        """Returns a 6-bit mask of the side to move's non-empty pits, indexed locally (bit 0 = first pit)."""
+        p = self.pits
+        base = 7 * self.player
+        return ((p[base] > 0) | (p[base + 1] > 0) << 1 | (p[base + 2] > 0) << 2
+                | (p[base + 3] > 0) << 3 | (p[base + 4] > 0) << 4 | (p[base + 5] > 0) << 5)
+
+    def legal_moves(self):
+        """Returns the side to move's legal moves as board indices (a shared, precomputed tuple)."""
+        return MOVES[self.player][self.legal_mask()]
+
+    def is_legal(self, action):
+        return 0 <= action - 7 * self.player < 6 and self.pits[action] > 0
+
+    def sweep(self):
+        """Ends the game: every seed still on the board goes to its owner's store."""
+        p = self.pits
+        p[6] += p[0] + p[1] + p[2] + p[3] + p[4] + p[5]
+        p[13] += p[7] + p[8] + p[9] + p[10] + p[11] + p[12]
+        for i in range(6):
+            p[i] = 0
+            p[i + 7] = 0
+
+    def play(self, action):
+        """
+        Plays a legal move for the side to move: sows, captures and passes the turn unless it ends in the mover's store.
+        Returns (extra_turn, captured), where captured counts the seeds gained this move as MancalaEnv rewards them.
+        """
+        p = self.pits
+        player = self.player
+        store = 6 if player == 0 else 13
+        ring = RINGS[action]
+        seeds = p[action]
+        p[action] = 0
+
+        # Distribute the seeds: a full lap each over the ring, then one more for the first `remainder` pits
+        laps, remainder = divmod(seeds, 13)
+        if laps:
+            for idx in ring:
+                p[idx] += laps
+        for k in range(remainder):
+            p[ring[k]] += 1
+        captured = laps + (STORE_POS[action] < remainder)
+        last = ring[(seeds - 1) % 13]
+
+        # Check for extra turn or capture
+        if last == store:
+            return True, captured
+        opposite = 12 - last
+        if p[last] == 1 and p[opposite] > 0 and last // 7 == player:
+            # As in the original engine, the whole move's gain (including sown store seeds) is added to the store
+            captured += p[opposite] + 1
+            p[store] += captured
+            p[opposite] = 0
+            p[last] = 0
+        self.player = 1 - player
+        return False, captured
+
+    def side_empty(self):
+        """True if the side to move has no seeds left, which ends the game on their turn."""
+        p = self.pits
+        base = 7 * self.player
+        return not (p[base] or p[base + 1] or p[base + 2] or p[base + 3] or p[base + 4] or p[base + 5])
+
+    def winner(self):
+        """Returns the player with the larger store, or None on a tie."""
+        if self.pits[6] > self.pits[13]:
+            return 0
+        if self.pits[13] > self.pits[6]:
+            return 1
+        return None
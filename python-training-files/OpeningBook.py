@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import mmap
+import struct
+import numpy as np
+from Symmetry import canonical_state
+
+# File layout: a fixed header followed by `count` records sorted by key.
+#   header: magic (8 bytes), version (uint16), plies (uint16), count (uint32), model id (16 ascii bytes)
+#   record: key (15 x uint8, the canonical form of the position, see Symmetry.py) + move ranking (6 x uint8, best move first)
+MAGIC = b"MNCLBOOK"
+VERSION = 2
+HEADER = struct.Struct("<8sHHI16s")
+KEY_SIZE = 15
+MOVES_SIZE = 6
+RECORD_SIZE = KEY_SIZE + MOVES_SIZE
+
+class OpeningBook:
+    def __init__(self, path):
+        """
+        Memory-maps an opening book file. Lookups binary-search the mapped records directly, so the table is
+        never copied into the process and every worker reading the same file shares the OS page cache.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.plies, self.count, model_id = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        if len(self._mm) != HEADER.size + self.count * RECORD_SIZE:
+            raise ValueError(f"{path} is truncated")
+        self.model_id = model_id.decode("ascii")
+
+    def __len__(self):
+        return self.count
+
+    def _key_at(self, i):
+        """Returns the key bytes of the i-th record."""
+        offset = HEADER.size + i * RECORD_SIZE
+        return self._mm[offset:offset + KEY_SIZE]
+
+    def lookup(self, state):
+        """Returns the ranked moves (local indices) for a 15-value state, or None if the position is not in the book."""
+        try:
+            key = bytes(canonical_state(state))
+        except ValueError: # Values outside 0..255 can never be in the book
+            return None
+        if len(key) != KEY_SIZE:
+            return None
+
+        # Binary search over the sorted records
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count or self._key_at(lo) != key:
+            return None
+        offset = HEADER.size + lo * RECORD_SIZE + KEY_SIZE
+        return list(self._mm[offset:offset + MOVES_SIZE])
+
+    def close(self):
+        self._mm.close()
+
+def enumerate_positions(plies):
+    """
+    Returns the canonical form of every state reachable from the starting position within the given number of moves
+    where the side to move has a legal move. A position and its side-swapped twin are one entry.
+    """
+    from MancalaBoard import MancalaBoard
+
+    start = MancalaBoard()
+    seen = {tuple(start.pits) + (start.player,)}
+    frontier = [start]
+    for _ in range(plies):
+        next_frontier = []
+        for board in frontier:
+            for action in board.legal_moves():
+                child = board.copy()
+                child.play(action)
+                state = tuple(child.pits) + (child.player,)
+                if state not in seen:
+                    seen.add(state)
+                    next_frontier.append(child)
+        frontier = next_frontier
+
+    # Positions where the side to move has no seeds end the game, so the server never asks about them
+    return list({tuple(canonical_state(state)) for state in seen if any(state[state[14] * 7:state[14] * 7 + 6])})
+
+def rank_moves(model_path, states, batch_size=4096):
+    """Ranks the moves of every state with the ONNX model, the same way the server does."""
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(model_path)
+    input_name = session.get_inputs()[0].name
+    output_name = session.get_outputs()[0].name
+    rankings = []
+    for start in range(0, len(states), batch_size):
+        batch = np.array(states[start:start + batch_size], dtype=np.float32)
+        act_values = session.run([output_name], {input_name: batch})[0]
+        rankings.append(np.argsort(act_values, axis=1)[:, ::-1])
+    return np.concatenate(rankings).astype(np.uint8)
+
+def write_book(path, plies, model_id, states, rankings):
+    """Writes the states and their rankings as a sorted opening book file."""
+    keys = np.array(states, dtype=np.uint8)
+    records = np.concatenate([keys, rankings], axis=1)
+    # Sorting column by column (first value most significant) matches the byte order the reader compares keys in
+    order = np.lexsort(keys.T[::-1])
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, plies, len(records), model_id.encode("ascii")))
+        f.write(records[order].tobytes())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds an opening book of ranked moves for the API server.")
+    parser.add_argument("--plies", type=int, default=6, help="Depth of the enumerated game tree (each move is one ply)")
+    parser.add_argument("--model", default="public/assets/mancala_agent_final.onnx")
+    parser.add_argument("--output", default="public/assets/opening_book.bin")
+    args = parser.parse_args()
+
+    states = enumerate_positions(args.plies)
+    print(f"Enumerated {len(states)} positions within {args.plies} plies")
+
+    with open(args.model, "rb") as f:
+        model_id = hashlib.sha256(f.read()).hexdigest()[:16] # Same identity the server computes for its model
+
+    rankings = rank_moves(args.model, states)
+    write_book(args.output, args.plies, model_id, states, rankings)
+    print(f"Opening book saved to {args.output} ({HEADER.size + len(states) * RECORD_SIZE} bytes)")
@@ -1,50 +1,93 @@
-import random
 import numpy as np
 from PER.SumTree import SumTree
 
 # Prioritized Experience Replay Buffer
 class PrioritizedReplayBuffer:
-    def __init__(self, capacity, alpha=0.6):
-        """Initializes the Prioritized Replay Buffer."""
+    def __init__(self, capacity, alpha=0.6, state_size=15):
+        """
+        Initializes the Prioritized Replay Buffer. Transitions are kept as a structure of preallocated typed arrays
+        (one row per transition), so storing one costs a few array writes and no Python objects.
+        """
         self.tree = SumTree(capacity)
+        self.capacity = capacity
         self.alpha = alpha
         self.epsilon = 1e-5  # To prevent zero priority
+        self.states = np.zeros((capacity, state_size), dtype=np.int16)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.int16)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.write = 0 # Next row to write; the oldest transition is overwritten once the buffer is full
+        self.count = 0
 
     def store(self, experience, priority):
         """Stores experience with priority in the buffer."""
-        p = (priority + self.epsilon) ** self.alpha
-        self.tree.add(p, experience)
+        state, action, reward, next_state, done = experience
+        row = self.write
+        self.states[row] = state
+        self.actions[row] = action
+        self.rewards[row] = reward
+        self.next_states[row] = next_state
+        self.dones[row] = done
+        self.tree.update_one(row, (priority + self.epsilon) ** self.alpha)
+        self.write = (row + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def store_batch(self, states, actions, rewards, next_states, dones, priorities):
+        """Stores a batch of transitions with their priorities in the buffer."""
+        rows = (self.write + np.arange(len(actions))) % self.capacity
+        self.states[rows] = states
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.next_states[rows] = next_states
+        self.dones[rows] = dones
+        self.tree.update(rows, (np.asarray(priorities, dtype=np.float64) + self.epsilon) ** self.alpha)
+        self.write = (self.write + len(rows)) % self.capacity
+        self.count = min(self.count + len(rows), self.capacity)
 
     def sample(self, batch_size, beta=0.4):
-        """Samples a batch of experiences from the buffer."""
-        batch = []
-        segment = self.tree.total_priority() / batch_size
-        priorities = []
-        indices = []
-        is_weights = np.zeros(batch_size)
-
-        for i in range(batch_size):
-            # Sample a value uniformly from each segment
-            a, b = segment * i, segment * (i + 1)
-            s = random.uniform(a, b)
-            idx, p, data = self.tree.get(s) 
-            priorities.append(p)
-            indices.append(idx)
-            batch.append(data)
-        
-        # Compute importance-sampling weights according to the PER formula
+        """
+        Samples a batch of experiences from the buffer. Returns (states, actions, rewards, next_states, dones) as arrays,
+        the sampled indices and their importance-sampling weights.
+        """
+        # Sample a value uniformly from each of batch_size equal segments of the total priority
         total_p = self.tree.total_priority()
-        sampling_probabilities = np.array(priorities) / total_p
+        segment = total_p / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        indices = self.tree.get(values)
+
+        # Compute importance-sampling weights according to the PER formula
+        sampling_probabilities = self.tree.priorities(indices) / total_p
         is_weights = (sampling_probabilities * self.size()) ** -beta
 
+        batch = (self.states[indices], self.actions[indices], self.rewards[indices], self.next_states[indices], self.dones[indices])
         return batch, indices, is_weights
 
     def update_priorities(self, indices, errors):
         """Updates the priorities of the experiences in the buffer. It does this by updating the SumTree with the new priorities."""
-        priorities = (errors + self.epsilon) ** self.alpha
-        for idx, p in zip(indices, priorities):
-            self.tree.update(idx, p)
+        priorities = (np.asarray(errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
 
     def size(self):
         """Returns the current size of the buffer."""
-        return self.tree.size
\ No newline at end of file
+        return self.count
+
+    def snapshot(self):
+        """Returns copies of the buffer's arrays (transitions and sum tree) and its write position, safe to save while it keeps changing."""
+        arrays = {name: getattr(self, name).copy() for name in ("states", "actions", "rewards", "next_states", "dones")}
+        arrays["tree"] = self.tree.tree.copy()
+        return arrays, {"capacity": self.capacity, "alpha": self.alpha, "write": self.write, "count": self.count}
+
+    def restore(self, arrays, scalars):
+        """
+        Takes over arrays saved by snapshot() as they are, e.g. copy-on-write memory maps, so restoring a full buffer
+        copies nothing until a row is written.
+        """
+        if scalars["capacity"] != self.capacity or arrays["states"].shape != self.states.shape:
+            raise ValueError(f"Checkpoint holds a buffer of {scalars['capacity']} transitions, this one holds {self.capacity}")
+        for name in ("states", "actions", "rewards", "next_states", "dones"):
+            setattr(self, name, arrays[name])
+        self.tree.tree = arrays["tree"]
+        self.alpha = scalars["alpha"]
+        self.write = scalars["write"]
+        self.count = scalars["count"]
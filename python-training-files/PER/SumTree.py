@@ -3,52 +3,50 @@ import numpy as np
 class SumTree:
     def __init__(self, capacity):
         """Initializes the SumTree."""
-        self.capacity = capacity # the total capacity of the tree
-        self.tree = np.zeros(2 * capacity - 1) # the tree structure that stores the sum of priorities (n + n/2 + n/4 + ... + 1 = 2n - 1)
-        self.data = np.zeros(capacity, dtype=object) # stores the data that was added to the tree
-        self.write = 0 # Current index to write data
-        self.size = 0 # Current size of the tree
+        self.capacity = capacity # the number of priorities the tree holds
+        self.leaves = 1 << max(0, (capacity - 1).bit_length()) # capacity rounded up to a power of two, so every leaf sits at the same depth
+        self.depth = self.leaves.bit_length() - 1
+        # The tree is stored as a heap: node i has children 2i and 2i + 1, the root is node 1 and the leaves start at self.leaves.
+        # Node 0 is unused. Leaves past capacity keep priority 0, so they are never sampled.
+        self.tree = np.zeros(2 * self.leaves)
 
-
-    def _propagate(self, idx, change):
-        """Propagates the change in priority up the tree. This is done by updating recursively the sum of priorities."""
-        parent = (idx - 1) // 2
-        self.tree[parent] += change
-        if parent != 0: # Stop condition
-            self._propagate(parent, change)
-
-    def _retrieve(self, idx, s):
-        """Retrieves the data index based on the priority value. This is done by recursively moving down the tree."""
-        left = 2 * idx + 1
-        right = left + 1
-        if left >= len(self.tree): # If the left child index is out of bounds, we are at a leaf node. Return the current index
-            return idx
-        if s <= self.tree[left]: # If the s, which is the priority, is less than the left child, we move to the left child. 
-                                 # This is because the left child has higher priority, so we want to explore that branch
-            return self._retrieve(left, s)
-        else: # Otherwise, we move to the right child. We subtract the left child's priority from s, so that we can explore the right child's branch
-            return self._retrieve(right, s - self.tree[left])
-        
     def total_priority(self):
         """Returns the total priority stored in the root node."""
-        return self.tree[0] # The root node stores the total sum of priorities.
+        return self.tree[1] # The root node stores the total sum of priorities.
+
+    def update(self, data_indices, priorities):
+        """Sets the priorities of a batch of data indices, then recomputes the sums above them one tree level at a time."""
+        nodes = np.asarray(data_indices, dtype=np.int64) + self.leaves
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes >>= 1 # A parent shared by several changed children is recomputed more than once, always to the same sum
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
 
-    def add(self, priority, data):
-        """Adds data with a given priority to the tree."""
-        idx = self.write + self.capacity - 1
-        self.data[self.write] = data
-        self.update(idx, priority)
-        self.write = (self.write + 1) % self.capacity # Update the write index to the next position. If we reach the end of the buffer, we wrap around to the beginning
-        self.size = min(self.size + 1, self.capacity) # Update the size of the tree, but ensure it does not exceed the capacity
+    def update_one(self, data_index, priority):
+        """Sets a single priority. Walking up with plain floats is much cheaper than a batched update of one item."""
+        tree = self.tree
+        node = data_index + self.leaves
+        tree[node] = priority
+        for _ in range(self.depth):
+            node >>= 1
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
 
-    def update(self, idx, priority):
-        """Updates the priority of a given index."""
-        change = priority - self.tree[idx] # Calculate the change in priority that needs to be propagated in order to keep the tree structure consistent
-        self.tree[idx] = priority
-        self._propagate(idx, change)
+    def get(self, values):
+        """
+        Finds the data index of every value in [0, total priority]. All values walk down the tree together: each one moves
+        to the right child, minus the left child's sum, whenever it is larger than the left child's sum.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values -= left_sum * go_right
+            nodes = left + go_right
+        # Rounding can push a value just past the last non-empty leaf
+        return np.minimum(nodes - self.leaves, self.capacity - 1)
 
-    def get(self, s):
-        """Retrieves the data index based on the priority value. It also returns the priority value and the data."""
-        idx = self._retrieve(0, s) 
-        dataIdx = idx - self.capacity + 1 
-        return idx, self.tree[idx], self.data[dataIdx]
\ No newline at end of file
+    def priorities(self, data_indices):
+        """Returns the stored priorities of the given data indices."""
+        return self.tree[np.asarray(data_indices, dtype=np.int64) + self.leaves]
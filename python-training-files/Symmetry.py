@@ -0,0 +1,82 @@
+import numpy as np
+
+# Mancala's only symmetry is swapping the two sides: the same pits with the other player to move is the same position
+# seen from the other chair. (Mirroring a side left to right is not one, since seeds are always sown the same way round.)
+# The canonical form puts the side to move in player 1's seat: its pits are 7-12, its store is 13 and the last value is 1.
+# Local moves (0-5, counted from the mover's first pit) mean the same in both forms.
+# The canonical form only keys tables (cache, book, transposition table, tablebase). The model takes positions as it
+# was trained on them: the agent's own pits at 0-5 when it plays seat 0 and at 7-12 when it plays seat 1.
+CANONICAL_PLAYER = 1
+SWAP = np.array(list(range(7, 14)) + list(range(0, 7))) # Pit i of the swapped board is pit SWAP[i] of the original
+
+def local_action(action, player):
+    """Board index of a pit (0-5 or 7-12) to the mover's local index (0-5)."""
+    return action - 7 * player
+
+def board_action(local, player):
+    """The mover's local index (0-5) to the board index of the pit."""
+    return local + 7 * player
+
+def swap_sides(states):
+    """The same positions from the other side: pits swapped half for half and the side to move flipped. Works on one state or a batch."""
+    states = np.asarray(states)
+    swapped = np.empty_like(states)
+    swapped[..., :14] = states[..., SWAP]
+    swapped[..., 14] = 1 - states[..., 14]
+    return swapped
+
+def agent_view(states):
+    """
+    A request board as the frontend sends it (the agent's pits always at 7-12, the last value the seat the agent plays:
+    1 if the human started) in the agent's own perspective, the form the model was trained on and the search root:
+    boards of an agent in seat 0 get their halves swapped, the last value is kept. Its own inverse; one state or a batch.
+    """
+    states = np.asarray(states)
+    flip = states[..., 14] == 0
+    if not flip.any():
+        return states
+    view = states.copy()
+    view[flip, :14] = states[flip][..., SWAP]
+    return view
+
+def canonical_states(states):
+    """Canonical form of one state or a (N, 15) batch: rows with player 0 to move are swapped, the others returned as they are."""
+    states = np.asarray(states)
+    flip = states[..., 14] != CANONICAL_PLAYER
+    if not flip.any():
+        return states
+    if states.ndim == 1:
+        return swap_sides(states)
+    canonical = states.copy()
+    canonical[flip] = swap_sides(states[flip])
+    return canonical
+
+def canonical_state(state):
+    """
+    Canonical form of a single 15-value state as a list of ints (for cache keys and book lookups). The last value is
+    the side to move, as in MancalaEnv.get_state or agent_view, not the seat value of a frontend request.
+    """
+    state = [int(v) for v in state]
+    if state[14] == CANONICAL_PLAYER:
+        return state
+    return state[7:14] + state[0:7] + [CANONICAL_PLAYER]
+
+def canonical_key(board):
+    """MancalaBoard.key() of the board's canonical form, so both sides of the same position share one entry."""
+    pits = board.pits
+    if board.player == CANONICAL_PLAYER:
+        return int.from_bytes(pits, "little") << 1 | CANONICAL_PLAYER
+    return int.from_bytes(pits[7:] + pits[:7], "little") << 1 | CANONICAL_PLAYER
+
+def with_swapped(states, actions, rewards, next_states, dones):
+    """
+    Augments a batch of transitions with their side-swapped twins. A twin is the same game played from the other
+    chair: same local action, reward and outcome, so every simulated game yields twice the training samples.
+    """
+    return (
+        np.concatenate([states, swap_sides(states)]),
+        np.concatenate([actions, actions]),
+        np.concatenate([rewards, rewards]),
+        np.concatenate([next_states, swap_sides(next_states)]),
+        np.concatenate([dones, dones]),
+    )
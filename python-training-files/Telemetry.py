@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+
+# One row per training episode. The log is a directory holding one append-only raw file per column and a schema.json,
+# so a reader can memory-map or tail any column without parsing the others.
+COLUMNS = (
+    ("episode", np.int32),
+    ("reward", np.float32),
+    ("outcome", np.int8),             # 1 win, 0 tie, -1 loss
+    ("position", np.int8),
+    ("epsilon", np.float32),
+    ("beta", np.float32),
+    ("win_rate", np.float32),         # Rolling over the window
+    ("tie_rate", np.float32),
+    ("mean_reward", np.float32),
+    ("td_error_mean", np.float32),    # |TD error| of the episode's training batches, NaN before training starts
+    ("td_error_p90", np.float32),
+    ("td_error_max", np.float32),
+    ("priority_total", np.float64),   # Replay buffer sum tree
+    ("priority_mean", np.float32),
+    ("buffer_size", np.int32),
+    ("training_step", np.int32),
+    ("elapsed", np.float64),          # Seconds since training started
+)
+SCHEMA_FILE = "schema.json"
+
+class RollingWindow:
+    def __init__(self, size):
+        """Mean of the last size values, updated in O(1) per value."""
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+
+    def add(self, value):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+class TrainingTelemetry:
+    def __init__(self, path, window=200, flush_every=100, report=True, resume_rows=None):
+        """
+        Streams per-episode training metrics to a columnar log at path. Rows are buffered in preallocated arrays and
+        appended to the column files every flush_every episodes, when a one-line summary is also printed (if report),
+        so memory stays constant however long training runs. Rolling rates and means cover the last window episodes.
+        A resumed run passes the number of episodes its checkpoint holds as resume_rows: the log is cut back to them (or
+        to the rows every column holds, if fewer) and the rolling windows and totals continue from its last rows.
+        Otherwise an old log at path is replaced.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.report = report
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, SCHEMA_FILE), "w") as f:
+            json.dump({"columns": [[name, np.dtype(dtype).name] for name, dtype in COLUMNS]}, f)
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "ab") for name, _ in COLUMNS}
+        # Rows written after the checkpoint are dropped. A column never grows: if the log holds fewer rows than the
+        # checkpoint (lost or partly flushed), every column is cut to the shortest one
+        rows = min([resume_rows or 0] + [os.fstat(f.fileno()).st_size // np.dtype(dtype).itemsize
+                                         for (_, dtype), f in zip(COLUMNS, self._files.values())])
+        if resume_rows and rows < resume_rows:
+            print(f"Telemetry log at {path} holds {rows} of the checkpoint's {resume_rows} episodes, resuming from there")
+        for (name, dtype), f in zip(COLUMNS, self._files.values()):
+            f.truncate(rows * np.dtype(dtype).itemsize)
+        self._rows = {name: np.zeros(flush_every, dtype=dtype) for name, dtype in COLUMNS}
+        self._count = 0
+
+        self._wins = RollingWindow(window)
+        self._ties = RollingWindow(window)
+        self._rewards = RollingWindow(window)
+        self._td_errors = deque(maxlen=32) # Only the latest batches, in case many train between two episodes
+        self.totals = {"wins": 0, "losses": 0, "ties": 0}
+        self._start = None # Set by the first episode, so start-up time does not count against the rates
+        self._elapsed_before = 0.0
+        if rows:
+            self._resume(read_log(path), window)
+
+    def _resume(self, log, window):
+        """Continues the totals, the rolling windows and the elapsed time of the run the log belongs to."""
+        outcomes = log["outcome"]
+        self.totals = {"wins": int(np.sum(outcomes == 1)), "losses": int(np.sum(outcomes == -1)), "ties": int(np.sum(outcomes == 0))}
+        for outcome, reward in zip(outcomes[-window:], log["reward"][-window:]):
+            self._wins.add(outcome == 1)
+            self._ties.add(outcome == 0)
+            self._rewards.add(float(reward))
+        if len(log["elapsed"]):
+            self._elapsed_before = float(log["elapsed"][-1])
+
+    def record_td_errors(self, errors):
+        """Keeps a training batch's TD errors until the episode they belong to is recorded."""
+        self._td_errors.append(np.abs(errors))
+
+    def record_episode(self, episode, reward, winner, position, agent):
+        """Adds one finished episode (with the agent's current exploration and replay buffer state) to the log."""
+        if self._start is None:
+            self._start = time.perf_counter()
+        outcome = 0 if winner is None else (1 if winner == position else -1)
+        self.totals["wins" if outcome == 1 else "ties" if outcome == 0 else "losses"] += 1
+        self._wins.add(outcome == 1)
+        self._ties.add(outcome == 0)
+        self._rewards.add(reward)
+
+        if self._td_errors:
+            errors = np.concatenate(self._td_errors)
+            td_mean, td_p90, td_max = errors.mean(), np.percentile(errors, 90), errors.max()
+            self._td_errors.clear()
+        else:
+            td_mean = td_p90 = td_max = np.nan
+        size = agent.memory.size()
+        total_priority = agent.memory.tree.total_priority()
+
+        row = self._count
+        values = (episode, reward, outcome, position, agent.epsilon, agent.beta, self._wins.mean(), self._ties.mean(),
+                  self._rewards.mean(), td_mean, td_p90, td_max, total_priority, total_priority / size if size else 0.0,
+                  size, agent.training_step, self._elapsed_before + time.perf_counter() - self._start)
+        for (name, _), value in zip(COLUMNS, values):
+            self._rows[name][row] = value
+        self._count += 1
+        if self._count == self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered rows to the column files and prints a summary of the last one."""
+        if self._count == 0:
+            return
+        for name, f in self._files.items():
+            f.write(self._rows[name][:self._count].tobytes())
+            f.flush()
+        if self.report:
+            last = {name: column[self._count - 1] for name, column in self._rows.items()}
+            elapsed = max(last["elapsed"], 1e-9)
+            print(f"Episode: {last['episode']} | Wins: {self.totals['wins']} | Losses: {self.totals['losses']} | Ties: {self.totals['ties']} | "
+                  f"Win rate: {last['win_rate']:.2%} | Reward: {last['mean_reward']:.2f} | ε: {last['epsilon']:.3f} | "
+                  f"|TD|: {last['td_error_mean']:.3f} | {last['episode'] / elapsed:.1f} episodes/s | {last['training_step'] / elapsed:.1f} steps/s")
+        self._count = 0
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+def read_log(path, start=0):
+    """
+    Reads the rows from start onwards of a telemetry log as {column: array}. Only rows present in every column are
+    returned, so a log that is being written to is always read consistently.
+    """
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        columns = [(name, np.dtype(dtype)) for name, dtype in json.load(f)["columns"]]
+    rows = min(os.path.getsize(os.path.join(path, f"{name}.bin")) // dtype.itemsize for name, dtype in columns)
+    data = {}
+    for name, dtype in columns:
+        with open(os.path.join(path, f"{name}.bin"), "rb") as f:
+            f.seek(start * dtype.itemsize)
+            data[name] = np.fromfile(f, dtype=dtype, count=max(0, rows - start))
+    return data
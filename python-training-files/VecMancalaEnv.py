@@ -0,0 +1,161 @@
+import numpy as np
+
+def _sowing_tables():
+    """
+    Precomputes, for every pit, the 13 pits its seeds are sown into (in order, skipping the opponent's store)
+    and where the mover's own store sits in that order. Pits that can never be played map to zeros.
+    """
+    rings = np.zeros((14, 13), dtype=np.int64)
+    store_pos = np.zeros(14, dtype=np.int64)
+    for action in list(range(0, 6)) + list(range(7, 13)):
+        player = action // 7
+        store = 6 if player == 0 else 13
+        opponent_store = 13 if player == 0 else 6
+        idx = action
+        for k in range(13):
+            idx = (idx + 1) % 14
+            if idx == opponent_store:
+                idx = (idx + 1) % 14
+            rings[action, k] = idx
+            if idx == store:
+                store_pos[action] = k
+    return rings, store_pos
+
+RINGS, STORE_POS = _sowing_tables()
+INITIAL_BOARD = np.array([4] * 6 + [0] + [4] * 6 + [0], dtype=np.int32)
+
+class VecMancalaEnv:
+    def __init__(self, num_envs, agent_position=0, auto_reset=True):
+        """
+        Runs num_envs Mancala games at once on a (num_envs, 14) board array, with the same rules and rewards
+        as MancalaEnv. agent_position may be a single value or one value per game.
+        With auto_reset, finished games start over inside step(); otherwise they stay finished and are skipped.
+        """
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.rows = np.arange(num_envs)
+        self.agent_position = np.zeros(num_envs, dtype=np.int32)
+        self.boards = np.zeros((num_envs, 14), dtype=np.int32)
+        self.current_player = np.zeros(num_envs, dtype=np.int32)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.terminal_states = np.zeros((num_envs, 15), dtype=np.int32) # Final state of games that ended in the last step
+        self.reset(agent_position)
+
+    def reset(self, agent_position=None):
+        """Resets every game and returns the (num_envs, 15) states."""
+        if agent_position is not None:
+            self.agent_position[:] = agent_position
+        self.boards[:] = INITIAL_BOARD
+        self.current_player[:] = 0
+        self.done[:] = False
+        return self.get_states()
+
+    def get_states(self):
+        """Returns the boards along with the active player of every game."""
+        return np.concatenate([self.boards, self.current_player[:, None]], axis=1)
+
+    def legal_mask(self):
+        """Returns a (num_envs, 6) mask of the current player's non-empty pits, indexed locally (0-5)."""
+        own_pits = self.current_player[:, None] * 7 + np.arange(6)
+        return self.boards[self.rows[:, None], own_pits] > 0
+
+    def sample_actions(self, rng=np.random):
+        """Picks a uniformly random legal move (as a board index) for every game."""
+        mask = self.legal_mask()
+        # Random scores on the legal pits only; games without a legal move get pit 0, which just ends the game
+        local = np.argmax(rng.random(mask.shape) * mask, axis=1)
+        return local + 7 * self.current_player
+
+    def step(self, actions):
+        """
+        Executes one move (a board index, as in MancalaEnv.make_move) in every game.
+        Returns the new states, the rewards, which games ended and which moves were valid.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        boards = self.boards
+        player = self.current_player
+        active = ~self.done
+        rewards = np.zeros(self.num_envs)
+        valid = np.zeros(self.num_envs, dtype=bool)
+        finished = np.zeros(self.num_envs, dtype=bool)
+
+        # If the current player has no seeds left, the remaining seeds are swept into their owners' stores
+        side_0 = boards[:, :6].sum(axis=1)
+        side_1 = boards[:, 7:13].sum(axis=1)
+        empty = active & np.where(player == 0, side_0 == 0, side_1 == 0)
+        if empty.any():
+            boards[empty, 6] += side_0[empty]
+            boards[empty, 13] += side_1[empty]
+            boards[empty, :6] = 0
+            boards[empty, 7:13] = 0
+            finished |= empty
+            valid |= empty
+
+        # Moves outside the current player's side or on an empty pit are rejected without changing the board
+        safe_actions = np.clip(actions, 0, 13)
+        in_range = (safe_actions == actions) & (actions // 7 == player) & (actions % 7 != 6)
+        legal = active & ~empty & in_range & (boards[self.rows, safe_actions] > 0)
+        rewards[active & ~empty & ~legal] = -300
+        valid |= legal
+
+        extra_turn = np.zeros(self.num_envs, dtype=bool)
+        captured = np.zeros(self.num_envs, dtype=np.int64)
+        moving = np.flatnonzero(legal)
+        if moving.size:
+            action = actions[moving]
+            seeds = boards[moving, action].astype(np.int64)
+            boards[moving, action] = 0
+
+            # Distribute the seeds: every pit of the ring gets a full lap each, the first `remainder` pits one more
+            ring = RINGS[action]
+            laps, remainder = np.divmod(seeds, 13)
+            sown = laps[:, None] + (np.arange(13) < remainder[:, None])
+            boards[moving[:, None], ring] += sown.astype(np.int32)
+            last = ring[np.arange(moving.size), (seeds - 1) % 13]
+            gained = sown[np.arange(moving.size), STORE_POS[action]]
+
+            # Check for extra turn or capture
+            store = np.where(player[moving] == 0, 6, 13)
+            extra = last == store
+            opposite = 12 - last
+            capture = (~extra & (boards[moving, last] == 1) & (boards[moving, opposite] > 0)
+                       & (last // 7 == player[moving]))
+            gained = gained + np.where(capture, boards[moving, opposite] + 1, 0)
+            # As in MancalaEnv, a capture adds everything counted as captured this move to the store
+            cap_rows = moving[capture]
+            boards[cap_rows, store[capture]] += gained[capture].astype(np.int32)
+            boards[cap_rows, opposite[capture]] = 0
+            boards[cap_rows, last[capture]] = 0
+
+            extra_turn[moving] = extra
+            captured[moving] = gained
+            player[moving] = np.where(extra, player[moving], 1 - player[moving])
+
+        rewards += self._rewards(valid, finished, extra_turn, captured)
+        self.done |= finished
+
+        states = self.get_states()
+        if self.auto_reset and finished.any():
+            self.terminal_states[finished] = states[finished]
+            boards[finished] = INITIAL_BOARD
+            player[finished] = 0
+            self.done[finished] = False
+            states[finished] = np.append(INITIAL_BOARD, 0)
+        return states, rewards, finished, valid
+
+    def _rewards(self, valid, finished, extra_turn, captured):
+        """Computes the rewards of valid moves exactly like MancalaEnv.calculate_reward."""
+        agent_store = self.boards[self.rows, self.agent_position * 7 + 6]
+        opponent_store = self.boards[self.rows, (1 - self.agent_position) * 7 + 6]
+        reward = captured * 0.7 + np.sign(agent_store - opponent_store) * 0.1
+
+        winner = self.winners()
+        outcome = np.where(winner == self.agent_position, 100, np.where(winner == -1, 20, -100))
+        reward += np.where(finished, outcome, 0)
+        reward += np.where(extra_turn, 1.0, 0)
+        return np.where(valid, reward, 0)
+
+    def winners(self, boards=None):
+        """Returns the player with the larger store for every game, or -1 on a tie."""
+        boards = self.boards if boards is None else boards
+        return np.where(boards[:, 6] > boards[:, 13], 0, np.where(boards[:, 13] > boards[:, 6], 1, -1))
@@ -1,13 +1,7 @@
-from DQNAgent import DQNAgent
-from test_agent import test_agent
+from test_agent import evaluate_agent
 
 if __name__ == "__main__":
-    agent = DQNAgent(state_size=15, action_size=6)
-    agent.load_model("./model_saves/mancala_agent_saved.keras")
+    model_path = "./model_saves/mancala_agent_saved.npz" # Written next to the .keras save by train.py, run by InferenceAgent
 
-    agent.epsilon = 0.0
-    agent.epsilon_min = 0.0
-    agent.epsilon_decay = 1.0
-
-    wins, losses, ties = test_agent(agent, 0, game_amount=500)
-    wins, losses, ties = test_agent(agent, 1, game_amount=500)
\ No newline at end of file
+    wins, losses, ties = evaluate_agent(model_path, 0, game_amount=500, epsilon=0.0)
+    wins, losses, ties = evaluate_agent(model_path, 1, game_amount=500, epsilon=0.0)
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from MancalaBoard import TOTAL_SEEDS
+from MancalaEnv import MancalaEnv
+from VecMancalaEnv import VecMancalaEnv
+from PER.PrioritizedReplayBuffer import PrioritizedReplayBuffer
+from Symmetry import agent_view
+from test_agent import play_games
+
+SEED = 0
+BENCHMARKS = ("make_move", "random_games", "replay_buffer", "dqn_replay", "api")
+
+def _result(value, unit, higher_is_better, gated=True):
+    """One measurement. Results that are not gated (tail latencies, which are noisy) are reported but never flagged."""
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better, "gated": gated}
+
+def _best_of(repeats, run):
+    """Runs a timed workload several times and keeps the fastest run, which is the least disturbed by the machine."""
+    return min(run() for _ in range(repeats))
+
+def _percentiles(latencies):
+    """Median and 99th percentile of a list of per-call latencies in seconds, in microseconds."""
+    latencies = np.asarray(latencies) * 1e6
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+def bench_make_move(moves=200_000, repeats=3):
+    """MancalaEnv.make_move throughput with random legal moves, resetting finished games."""
+    def run():
+        random.seed(SEED)
+        env = MancalaEnv()
+        start = time.perf_counter()
+        for _ in range(moves):
+            actions = env.available_actions()
+            env.make_move(random.choice(actions) if actions else 0)
+            if env.done:
+                env.reset()
+        return time.perf_counter() - start
+
+    elapsed = _best_of(repeats, run)
+    return {"make_move/moves_per_s": _result(moves / elapsed, "moves/s", True)}
+
+def bench_random_games(games=20_000, repeats=3):
+    """Full random games per second on one core (the random_games.py workload, without the process pool)."""
+    def run():
+        start = time.perf_counter()
+        play_games(None, 0, games, np.random.default_rng(SEED))
+        return time.perf_counter() - start
+
+    elapsed = _best_of(repeats, run)
+    return {"random_games/games_per_s": _result(games / elapsed, "games/s", True)}
+
+def bench_replay_buffer(capacity=100_000, batch_size=256, calls=2_000):
+    """Latency of one sample() and one update_priorities() call on a full buffer, and of storing one transition."""
+    rng = np.random.default_rng(SEED)
+    buffer = PrioritizedReplayBuffer(capacity)
+    buffer.store_batch(
+        rng.integers(0, 48, size=(capacity, 15)), rng.integers(0, 6, size=capacity), rng.normal(size=capacity),
+        rng.integers(0, 48, size=(capacity, 15)), rng.random(capacity) < 0.05, rng.random(capacity),
+    )
+    state = np.zeros(15, dtype=np.int64)
+
+    sample, update, store = [], [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        _, indices, _ = buffer.sample(batch_size)
+        sample.append(time.perf_counter() - start)
+
+        errors = rng.random(batch_size)
+        start = time.perf_counter()
+        buffer.update_priorities(indices, errors)
+        update.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        buffer.store((state, 0, 0.0, state, False), 1.0)
+        store.append(time.perf_counter() - start)
+
+    results = {}
+    for name, latencies in (("sample", sample), ("update_priorities", update), ("store", store)):
+        p50, p99 = _percentiles(latencies)
+        results[f"replay_buffer/{name}_p50_us"] = _result(p50, "us", False)
+        results[f"replay_buffer/{name}_p99_us"] = _result(p99, "us", False, gated=False)
+    return results
+
+def bench_dqn_replay(steps=100, warm_up=5):
+    """Time of one DQNAgent.replay() call (sample, train step, priority update) on a filled buffer."""
+    import tensorflow as tf
+    from DQNAgent import DQNAgent
+
+    tf.random.set_seed(SEED)
+    rng = np.random.default_rng(SEED)
+    agent = DQNAgent(state_size=15, action_size=6)
+    size = 10_000
+    agent.memory.store_batch(
+        rng.integers(0, 48, size=(size, 15)), rng.integers(0, 6, size=size), rng.normal(size=size),
+        rng.integers(0, 48, size=(size, 15)), rng.random(size) < 0.05, rng.random(size),
+    )
+    agent.update_target_freq = steps + warm_up + 1 # The periodic target copy is not part of the step being measured
+    for _ in range(warm_up): # Traces the tf.function
+        agent.replay()
+
+    latencies = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        agent.replay()
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = _percentiles(latencies)
+    return {
+        "dqn_replay/step_p50_ms": _result(p50 / 1000, "ms", False),
+        "dqn_replay/step_p99_ms": _result(p99 / 1000, "ms", False, gated=False),
+    }
+
+def _api_positions(count):
+    """
+    Distinct-ish positions from random games in which the side to move has a legal move, as the frontend sends them:
+    the side to move (the agent) at pits 7-12 and its seat last, so both seats, and the server's swap, are exercised.
+    Boards the engine's capture rule pushed past the game's seed total are skipped, as no client sends them.
+    """
+    rng = np.random.default_rng(SEED)
+    env = VecMancalaEnv(1_000)
+    positions = []
+    while len(positions) < count:
+        env.step(env.sample_actions(rng))
+        states = env.get_states()
+        keep = env.legal_mask().any(axis=1) & (states[:, :14].sum(axis=1) <= TOTAL_SEEDS)
+        positions.extend(agent_view(states[keep]).tolist())
+    return positions[:count]
+
+async def _load(client, positions, concurrency):
+    """Sends every position to /best_move/ from concurrency clients that each wait for their answer before sending the next."""
+    queue = list(reversed(positions))
+    latencies = []
+
+    async def client_loop():
+        while queue:
+            state = queue.pop()
+            start = time.perf_counter()
+            response = await client.post("/best_move/", json={"state": state})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+def bench_api(concurrency_levels=(1, 8, 32, 128), requests=2_000):
+    """
+    /best_move/ latency and throughput at several concurrency levels, driven in-process through the ASGI app
+    (no sockets, so the numbers cover the server's own work). The cache is cleared before every level, so every
+    request goes through the model. Needs the ONNX model, so run it from the repository root like the server.
+    """
+    import httpx
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server"))
+    import main
+
+    positions = _api_positions(requests)
+    results = {}
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await _load(client, positions[:100], 8) # Warm-up
+            for concurrency in concurrency_levels:
+                main.cache.clear()
+                latencies, elapsed = await _load(client, positions, concurrency)
+                p50, p99 = _percentiles(latencies)
+                results[f"api/c{concurrency}/requests_per_s"] = _result(len(positions) / elapsed, "requests/s", True)
+                results[f"api/c{concurrency}/latency_p50_us"] = _result(p50, "us", False)
+                results[f"api/c{concurrency}/latency_p99_us"] = _result(p99, "us", False, gated=False)
+
+    asyncio.run(run())
+    return results
+
+def environment():
+    """Describes the machine and library versions, so results are only compared between like setups."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def run_benchmarks(names=BENCHMARKS):
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        results.update(globals()[f"bench_{name}"]())
+        print(f"{name}: done in {time.perf_counter() - start:.1f}s")
+    return {"environment": environment(), "results": results}
+
+def compare(current, baseline, tolerance):
+    """
+    Compares every result with the baseline and returns the regressions: gated results that got worse by more than
+    tolerance (a fraction of the baseline value). Prints one line per result present in both runs.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before, after = baseline["results"][name]["value"], result["value"]
+        change = (after - before) / before if before else 0.0
+        worse = -change if result["higher_is_better"] else change
+        regressed = worse > tolerance and result.get("gated", True)
+        flag = "REGRESSION" if regressed else ("improved" if worse < -tolerance else "")
+        print(f"{name:40s} {before:14,.2f} -> {after:14,.2f} {result['unit']:11s} {change:+8.1%} {flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the game engine, the replay buffer, training steps and the API.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results as JSON")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Relative slowdown flagged as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.only)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["environment"].get("platform") != current["environment"]["platform"]:
+            print("Warning: the baseline was recorded on a different platform")
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
@@ -1,7 +1,17 @@
+import argparse
 import os
+import sys
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras.utils import register_keras_serializable # type: ignore
 import tf2onnx
+import onnxruntime as ort
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from VecMancalaEnv import VecMancalaEnv
+from InferenceAgent import variant_path
+from Symmetry import canonical_states
 
 # Define custom function
 @register_keras_serializable()
@@ -9,33 +19,100 @@ def _combine_streams(inputs):
     val, adv = inputs
     return val + (adv - tf.reduce_mean(adv, axis=1, keepdims=True))
 
-# Paths
-keras_path = "public/assets/mancala_agent_final.keras"
-onnx_path = "public/assets/mancala_agent_final.onnx"
-
-# Custom objects dictionary
-custom_objects = {"_combine_streams": _combine_streams}
-
-# Load Keras model
-model = tf.keras.models.load_model(keras_path, custom_objects=custom_objects)
-print("Keras model loaded")
-
-# Convert directly to ONNX
-try:
-    # Convert the model
-    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
-    spec = (tf.TensorSpec((None, 15), tf.float32, name="input"),)
-    output_path = onnx_path
-    
-    model_proto, _ = tf2onnx.convert.from_keras(
-        model, 
-        input_signature=spec,
-        opset=13,
-        output_path=output_path
-    )
-    
-    print(f"ONNX model saved to {onnx_path}")
-    print(f"ONNX model size: {os.path.getsize(onnx_path) / 1024 / 1024:.2f} MB")
-    
-except Exception as e:
-    print(f"Error during conversion: {e}")
\ No newline at end of file
+def position_corpus(size=20_000, seed=0):
+    """Fixed corpus of positions from random games, prepared the way the server feeds them to the model."""
+    rng = np.random.default_rng(seed)
+    env = VecMancalaEnv(1_000)
+    states = []
+    while len(states) * 1_000 < size:
+        env.step(env.sample_actions(rng))
+        states.append(env.get_states())
+    states = np.concatenate(states)[:size]
+    # Positions where the side to move has no seeds are never asked about
+    own_pits = states[:, 14:15] * 7 + np.arange(6)
+    legal = np.take_along_axis(states, own_pits, axis=1) > 0
+    states, legal = states[legal.any(axis=1)], legal[legal.any(axis=1)]
+    # Canonical form, as server/main.py prepare_state feeds the model (local moves, so legal is unchanged)
+    return canonical_states(states).astype(np.float32), legal
+
+def ranking_agreement(reference_path, out_path, corpus):
+    """Compares a variant's move rankings with the reference model's on the corpus (the best legal move and the full ranking)."""
+    states, legal = corpus
+    reference = ort.InferenceSession(reference_path)
+    variant = ort.InferenceSession(out_path)
+    expected = reference.run(None, {reference.get_inputs()[0].name: states})[0]
+    actual = variant.run(None, {variant.get_inputs()[0].name: states})[0]
+    return {
+        # The move actually played: the best legal one
+        "top1": float(np.mean(np.argmax(np.where(legal, expected, -np.inf), axis=1) == np.argmax(np.where(legal, actual, -np.inf), axis=1))),
+        "full_ranking": float(np.mean(np.all(np.argsort(expected, axis=1) == np.argsort(actual, axis=1), axis=1))),
+        "max_abs_error": float(np.max(np.abs(expected - actual))),
+    }
+
+def export_variants(onnx_path):
+    """Writes the graph-optimized and dynamically quantized (INT8 weights) variants next to the FP32 model."""
+    # Offline graph optimization: constant folding and node fusions, saved so the server does not redo them at load time.
+    # Extended (not "all") keeps the saved graph free of layout transforms tied to this machine's CPU.
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = variant_path(onnx_path, "optimized")
+    ort.InferenceSession(onnx_path, sess_options=options)
+
+    # Dynamic quantization: INT8 weights, activations quantized on the fly per batch
+    quantize_dynamic(onnx_path, variant_path(onnx_path, "int8"), weight_type=QuantType.QInt8)
+    return ["optimized", "int8"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exports a Keras model to ONNX, with optimized and INT8 variants.")
+    parser.add_argument("--keras", default="public/assets/mancala_agent_final.keras")
+    parser.add_argument("--league", help="Export the league's highest-rated Keras model (see League.py) instead of --keras")
+    args = parser.parse_args()
+
+    # Paths
+    keras_path = args.keras
+    onnx_path = "public/assets/mancala_agent_final.onnx"
+    if args.league:
+        from League import League
+        best = League(args.league).best()
+        if best is None:
+            print(f"The league at {args.league} has no Keras models")
+            sys.exit(1)
+        name, player = best
+        keras_path = player["export"]
+        print(f"Exporting {name} (Elo {player['rating']:.1f} over {player['games']} games)")
+
+    # Custom objects dictionary
+    custom_objects = {"_combine_streams": _combine_streams}
+
+    # Load Keras model
+    model = tf.keras.models.load_model(keras_path, custom_objects=custom_objects)
+    print("Keras model loaded")
+
+    # Convert directly to ONNX
+    try:
+        # Convert the model
+        os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+        spec = (tf.TensorSpec((None, 15), tf.float32, name="input"),)
+        output_path = onnx_path
+
+        model_proto, _ = tf2onnx.convert.from_keras(
+            model,
+            input_signature=spec,
+            opset=13,
+            output_path=output_path
+        )
+
+        print(f"ONNX model saved to {onnx_path}")
+        print(f"ONNX model size: {os.path.getsize(onnx_path) / 1024 / 1024:.2f} MB")
+
+    except Exception as e:
+        print(f"Error during conversion: {e}")
+        sys.exit(1)
+
+    # Export the variants and check them against the FP32 model's move rankings
+    corpus = position_corpus()
+    for variant in export_variants(onnx_path):
+        path = variant_path(onnx_path, variant)
+        agreement = ranking_agreement(onnx_path, path, corpus)
+        print(f"{variant}: {path} ({os.path.getsize(path) / 1024 / 1024:.2f} MB) | top-1 agreement {agreement['top1']:.2%} | "
+              f"full ranking agreement {agreement['full_ranking']:.2%} | max |ΔQ| {agreement['max_abs_error']:.4f}")
@@ -0,0 +1,67 @@
+from Telemetry import read_log
+import matplotlib.pyplot as plt
+import argparse
+import os
+import time
+import numpy as np
+
+def tail(path, poll_seconds=2.0):
+    """Yields the rows appended to a telemetry log since the last call, waiting for the log to appear and to grow."""
+    while not os.path.exists(os.path.join(path, "schema.json")):
+        time.sleep(poll_seconds)
+    seen = 0
+    while True:
+        rows = read_log(path, start=seen)
+        count = len(rows["episode"])
+        if count:
+            seen += count
+            yield rows
+        else:
+            time.sleep(poll_seconds)
+
+def print_rows(rows):
+    last = {name: column[-1] for name, column in rows.items()}
+    print(f"Episode: {last['episode']} | Win rate: {last['win_rate']:.2%} | Ties: {last['tie_rate']:.2%} | "
+          f"Reward: {last['mean_reward']:.2f} | ε: {last['epsilon']:.3f} | β: {last['beta']:.2f} | "
+          f"|TD| mean/p90/max: {np.nanmean(rows['td_error_mean']):.3f}/{np.nanmax(rows['td_error_p90']):.3f}/{np.nanmax(rows['td_error_max']):.3f} | "
+          f"Priority mean: {last['priority_mean']:.3f} | Buffer: {last['buffer_size']} | Steps: {last['training_step']}")
+
+def live_plot(path, poll_seconds=2.0):
+    """Redraws the rolling win rate, the mean reward, epsilon and the TD error as the log grows."""
+    plt.ion()
+    figure, axes = plt.subplots(2, 2, figsize=(12, 7), sharex=True)
+    panels = (
+        (axes[0, 0], ("win_rate", "tie_rate"), "Rolling win / tie rate"),
+        (axes[0, 1], ("mean_reward",), "Rolling mean reward"),
+        (axes[1, 0], ("epsilon", "beta"), "Exploration ε and PER β"),
+        (axes[1, 1], ("td_error_mean", "td_error_p90"), "|TD error|"),
+    )
+    history = {name: np.empty(0) for _, names, _ in panels for name in names}
+    episodes = np.empty(0)
+
+    for rows in tail(path, poll_seconds):
+        episodes = np.concatenate([episodes, rows["episode"]])
+        for name in history:
+            history[name] = np.concatenate([history[name], rows[name]])
+        print_rows(rows)
+        for axis, names, title in panels:
+            axis.clear()
+            for name in names:
+                axis.plot(episodes, history[name], label=name)
+            axis.set_title(title)
+            axis.legend(loc="upper left")
+        figure.canvas.draw_idle()
+        plt.pause(0.01)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Follows the telemetry log of a running (or finished) training run.")
+    parser.add_argument("path", nargs="?", default="model_saves/telemetry")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between checks for new rows")
+    parser.add_argument("--text", action="store_true", help="Print a summary line per batch of rows instead of plotting")
+    args = parser.parse_args()
+
+    if args.text:
+        for rows in tail(args.path, args.poll):
+            print_rows(rows)
+    else:
+        live_plot(args.path, args.poll)
@@ -1,64 +1,101 @@
-from MancalaEnv import MancalaEnv
-import random
+from VecMancalaEnv import VecMancalaEnv
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import math
+import os
+import time
 import numpy as np
 
-# Set random seeds for reproducibility
-random.seed(45)
-np.random.seed(45)
+SHARD_SIZE = 1024 # Games per shard. Shards (and their seeds) depend only on game_amount, never on the worker count
+SEED = 45
 
-def test_agent(agent, position, game_amount=5_000):
-    """Evaluates the agent's performance over a set number of games."""
-    
-    env = MancalaEnv(position)  # Initialize Mancala environment
-    wins = losses = ties = 0
+def play_games(policy, position, game_amount, rng):
+    """
+    Plays game_amount games at once against a random opponent and returns (wins, losses, ties) for the agent.
+    policy maps a (n, 15) batch of states and their (n, 6) legal-move masks to local actions, so every agent turn across
+    all live games is one call (DQNAgent.act_batch fits). If policy is None the agent plays random legal moves.
+    """
+    env = VecMancalaEnv(game_amount, agent_position=position, auto_reset=False)
+    while not env.done.all():
+        actions = env.sample_actions(rng) # Random moves for the opponent (and for a random agent)
+        agent_turn = ~env.done & (env.current_player == position)
+        if policy is not None and agent_turn.any():
+            # A game without legal moves just ends on whatever pit is played
+            actions[agent_turn] = policy(env.get_states()[agent_turn], env.legal_mask()[agent_turn]) + 7 * position
+        env.step(actions)
+
+    winners = env.winners()
+    return int(np.sum(winners == position)), int(np.sum(winners == 1 - position)), int(np.sum(winners == -1))
+
+def wilson_interval(successes, trials, z=1.96):
+    """Returns the Wilson score interval of a binomial proportion (95% by default)."""
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return center - margin, center + margin
+
+def _shards(game_amount, seed):
+    """Splits game_amount into fixed-size shards, each with its own independent seed."""
+    sizes = [SHARD_SIZE] * (game_amount // SHARD_SIZE)
+    if game_amount % SHARD_SIZE:
+        sizes.append(game_amount % SHARD_SIZE)
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
 
-    for _ in range(game_amount):
-        state = env.reset()  # Reset environment for a new game
+_worker_policy = None
 
-        while not env.done:
-            valid = env.available_actions()  # Get valid actions
-            
-            if env.current_player == position:
-                # Convert valid actions to a local index [0-5] based on position
-                mapped = [v - 7 * position for v in valid]
-                # If no mapped moves available, break out of loop (game over)
-                if not mapped:
-                    break
-                candidate_moves = agent.act(state, mapped)  # Agent selects candidate moves
-                # Select the first candidate move; if candidate_moves is empty, fallback to a random move
-                if candidate_moves:
-                    action = candidate_moves[0]
-                else:
-                    action = random.choice(mapped)
-                    
-                real_action = action + 7 * position  # Convert back to board index
-                env.make_move(real_action)  # Execute move
-                state = env.get_state()  # Update state
-            else:
-                if not valid:
-                    break
-                # Opponent selects a random move
-                mapped = [v - 7 * (1 - position) for v in valid]
-                # If no mapped moves available, break out of loop
-                if not mapped:
-                    break
-                action = random.choice(mapped)
-                real_action = action + 7 * (1 - position)
-                env.make_move(real_action)
-                state = env.get_state()
+def _init_worker(model_path, epsilon):
+    """Loads the model once per worker process."""
+    global _worker_policy
+    if model_path is None:
+        return
+    if model_path.endswith((".onnx", ".npz")): # Inference-only backends, no TensorFlow start-up in the workers
+        from InferenceAgent import InferenceAgent
+        agent = InferenceAgent(model_path)
+    else:
+        from DQNAgent import DQNAgent
+        agent = DQNAgent(state_size=15, action_size=6)
+        agent.load_model(model_path)
+    agent.epsilon = epsilon
+    _worker_policy = agent.act_batch
 
-        # Determine game outcome based on final board state
-        if env.board[6] > env.board[13] and position == 0:
-            wins += 1
-        elif env.board[6] < env.board[13] and position == 1:
-            wins += 1
-        elif env.board[6] < env.board[13] and position == 0:
-            losses += 1
-        elif env.board[6] > env.board[13] and position == 1:
-            losses += 1
-        else:
-            ties += 1
+def _play_shard(position, games, seed_seq):
+    # The agent's own exploration draws come from NumPy's global generator, so it is seeded per shard as well
+    np.random.seed(seed_seq.generate_state(1)[0])
+    return play_games(_worker_policy, position, games, np.random.default_rng(seed_seq))
 
-    print(f"Position {position} - Wins: {wins}, Losses: {losses}, Ties: {ties}")
+def _report(position, wins, losses, ties, elapsed):
+    games = wins + losses + ties
+    low, high = wilson_interval(wins, games)
+    print(f"Position {position} - Wins: {wins}, Losses: {losses}, Ties: {ties} | "
+          f"Win rate: {wins / games:.2%} (95% CI {low:.2%}-{high:.2%}) | {games / elapsed:,.0f} games/s")
+
+def evaluate_agent(model_path, position, game_amount=5_000, epsilon=0.0, workers=None, seed=SEED):
+    """
+    Evaluates a saved model (or a fully random agent if model_path is None) over game_amount games, sharded across
+    a process pool. Results are the same for any number of workers. .onnx and .npz models run without TensorFlow.
+    """
+    start = time.perf_counter()
+    shards = _shards(game_amount, seed)
+    workers = min(workers or os.cpu_count(), len(shards))
+    context = multiprocessing.get_context("spawn") # TensorFlow does not survive a fork
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(model_path, epsilon)) as pool:
+        results = list(pool.map(_play_shard, *zip(*[(position, games, s) for games, s in shards])))
+
+    wins, losses, ties = (sum(r[i] for r in results) for i in range(3))
+    _report(position, wins, losses, ties, time.perf_counter() - start)
+    return wins, losses, ties
+
+def test_agent(agent, position, game_amount=5_000, seed=SEED):
+    """Evaluates an in-memory agent's performance over a set number of games, using the agent's epsilon."""
+    start = time.perf_counter()
+    wins = losses = ties = 0
+    for games, seed_seq in _shards(game_amount, seed):
+        np.random.seed(seed_seq.generate_state(1)[0])
+        w, l, t = play_games(agent.act_batch, position, games, np.random.default_rng(seed_seq))
+        wins, losses, ties = wins + w, losses + l, ties + t
 
-    return wins, losses, ties
\ No newline at end of file
+    _report(position, wins, losses, ties, time.perf_counter() - start)
+    return wins, losses, ties
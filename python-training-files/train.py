@@ -1,7 +1,15 @@
 from MancalaEnv import *
 from DQNAgent import DQNAgent
+from Telemetry import TrainingTelemetry, read_log
+from Checkpoint import Checkpointer
+from League import League
+from Symmetry import board_action, local_action, with_swapped
 import matplotlib.pyplot as plt
 import tensorflow as tf
+import argparse
+import multiprocessing
+import os
+import queue
 import random
 import numpy as np
 
@@ -10,110 +18,233 @@ random.seed(42)
 np.random.seed(42)
 tf.random.set_seed(42)
 
-def train_agent(episodes=5000):
-    """Trains a DQN agent to play Mancala."""
+def play_episode(agent, env, agent_position, remember):
+    """Plays one game of the agent against a random opponent, passing every transition to remember. Returns the episode reward."""
+    state = env.reset(agent_position=agent_position)  # reset now returns full state
+    episode_reward = 0
+    done = False
+    last_action = None
+
+    while not done:
+        actions = env.actions()
+        if env.current_player == agent_position:
+            # Agent's turn: map valid actions from the full board index to local index
+            mapped_actions = [local_action(a, agent_position) for a in actions]
+            candidate_moves = agent.act(state, mapped_actions)  # Expects an ordered list of candidate moves
+            real_action = None
+
+            valid_actions = env.available_actions()
+            # Iterate through candidate moves and pick the first one that is legal
+            for move in candidate_moves:
+                candidate = board_action(move, agent_position)
+                if candidate in valid_actions:
+                    real_action = candidate
+                    last_action = move  # Store the local action used
+                    break
+
+            initial_state = state.copy()
+            _, reward = env.make_move(real_action)
+            episode_reward += reward
+
+            if env.done:
+                remember(initial_state, last_action, reward, state, True)  # Terminal state
+
+            # If the game is not over, simulate opponent's moves
+            if not env.done:
+                while env.current_player != agent_position and not env.done:
+                    opp_valid = env.available_actions()
+                    if not opp_valid:
+                        _, reward = env.make_move(0)  # Trigger end-of-game procedure
+                        episode_reward += reward
+                        remember(initial_state, last_action, reward, state, True)  # Terminal state
+                        continue
+                    opp_action = random.choice(opp_valid)
+                    env.make_move(opp_action)
+
+            next_state = env.get_state()  # Get updated state with current player indicator
+            done = env.done
+
+            # Store experience with next_state after opponent's moves
+            remember(initial_state, last_action, reward, next_state, done)
+            state = next_state
+        else:
+            opp_valid = env.available_actions()
+            if not opp_valid:
+                env.make_move(0)  # Trigger end-of-game procedure
+                continue
+            opp_action = random.choice(opp_valid)
+            env.make_move(opp_action)
+            state = env.get_state()
+            done = env.done
+
+            if done:
+                reward = env.calculate_reward(True, agent_position)
+                episode_reward += reward
+                remember(state, last_action, reward, state, done)  # Terminal state
+
+    return episode_reward
+
+def train_agent(episodes=5000, telemetry_path="model_saves/telemetry", checkpoint_dir="model_saves/checkpoint", resume=False, league_dir=None, league_every=1000):
+    """
+    Trains a DQN agent to play Mancala. Per-episode metrics are streamed to a telemetry log, whose path is returned.
+    The whole trainer state is checkpointed every 100 episodes; with resume, training continues from the newest checkpoint.
+    With league_dir, a snapshot of the model joins that league (see League.py) every league_every episodes.
+    """
     
     agent = DQNAgent(15, 6)  # State size = 15: board + current player indicator
-    # agent.load_model("mancala_agent_saved.keras")  # Load saved model if available
     env = MancalaEnv()
-    wins = losses = ties = 0
-    rewards = []
-    win_loss_history = []
-    agent_position = 1
+    checkpointer = Checkpointer(checkpoint_dir)
+    trainer_state = checkpointer.load(agent) if resume else None
+    start_episode, agent_position = (trainer_state["episode"], trainer_state["agent_position"]) if trainer_state else (0, 1)
+    telemetry = TrainingTelemetry(telemetry_path, resume_rows=start_episode)
+    league = League(league_dir) if league_dir else None
 
-    for episode in range(episodes):
+    for episode in range(start_episode, episodes):
         # Randomize starting position for the agent (0 or 1)
         agent_position = 1 - agent_position  # Flip every episode for equal training
-        state = env.reset(agent_position=agent_position)  # reset now returns full state
-        episode_reward = 0
-        done = False
-        last_action = None
-
-        while not done:
-            actions = env.actions()
-            if env.current_player == agent_position:
-                # Agent's turn: map valid actions from the full board index to local index
-                mapped_actions = [a - 7 * agent_position for a in actions]
-                candidate_moves = agent.act(state, mapped_actions)  # Expects an ordered list of candidate moves
-                real_action = None
-
-                valid_actions = env.available_actions()
-                # Iterate through candidate moves and pick the first one that is legal
-                for move in candidate_moves:
-                    candidate = move + 7 * agent_position
-                    if candidate in valid_actions:
-                        real_action = candidate
-                        last_action = move  # Store the local action used
-                        break
-
-                initial_state = state.copy()
-                _, reward = env.make_move(real_action)
-                episode_reward += reward
-
-                if env.done:
-                    agent.remember(initial_state, last_action, reward, state, True)  # Terminal state
-
-                # If the game is not over, simulate opponent's moves
-                if not env.done:
-                    while env.current_player != agent_position and not env.done:
-                        opp_valid = env.available_actions()
-                        if not opp_valid:
-                            _, reward = env.make_move(0)  # Trigger end-of-game procedure
-                            episode_reward += reward
-                            agent.remember(initial_state, last_action, reward, state, True)  # Terminal state
-                            continue
-                        opp_action = random.choice(opp_valid)
-                        env.make_move(opp_action)
-
-                next_state = env.get_state()  # Get updated state with current player indicator
-                done = env.done
-
-                # Store experience with next_state after opponent's moves
-                agent.remember(initial_state, last_action, reward, next_state, done)
-                state = next_state
-            else:
-                opp_valid = env.available_actions()
-                if not opp_valid:
-                    env.make_move(0)  # Trigger end-of-game procedure
-                    continue
-                opp_action = random.choice(opp_valid)
-                env.make_move(opp_action)
-                state = env.get_state()
-                done = env.done
-
-                if done:
-                    reward = env.calculate_reward(True, agent_position)
-                    episode_reward += reward
-                    agent.remember(state, last_action, reward, state, done)  # Terminal state
-
-        # Update win/loss stats
-        winner = env.determine_winner_player()
-        if winner == agent_position:
-            wins += 1
-        elif winner is None:
-            ties += 1
-        else:
-            losses += 1
+        episode_reward = play_episode(agent, env, agent_position, agent.remember)
 
         # Update training
-        agent.replay()
-        win_loss_history.append((wins, losses, ties))
-        rewards.append(episode_reward)
+        if agent.replay():
+            telemetry.record_td_errors(agent.last_td_errors)
+        telemetry.record_episode(episode + 1, episode_reward, env.determine_winner_player(), agent_position, agent)
 
         # Save model periodically - Checkpoint
         if (episode + 1) % 100 == 0:
             agent.save_model(f"model_saves/mancala_agent_saved.keras")
+            agent.export_weights("model_saves/mancala_agent_saved.npz") # For agent_testing.py, without TensorFlow
+            checkpointer.save(agent, {"episode": episode + 1, "agent_position": agent_position})
+        if league and (episode + 1) % league_every == 0:
+            league.add_agent(agent, f"episode-{episode + 1:07d}")
 
-        print(f"Episode: {episode+1}/{episodes} | Wins: {wins} | Losses: {losses} | Ties: {ties} | ε: {agent.epsilon:.3f} | Reward: {episode_reward:.2f} | Position: {agent_position}")
+    # Save final model
+    checkpointer.wait()
+    telemetry.close()
+    agent.save_model("model_saves/mancala_agent_final.keras")
+
+    return telemetry_path
+
+def _actor(actor_id, weights_queue, transitions_queue, stop_event):
+    """
+    Actor process: plays games with the newest weight snapshot it has received and sends each finished episode's
+    transitions, reward and winner to the learner.
+    """
+    seed = 42 + actor_id
+    random.seed(seed)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+    agent = DQNAgent(15, 6)
+    env = MancalaEnv()
+    agent_position = actor_id % 2
+
+    while not stop_event.is_set():
+        # Only the newest snapshot matters, older ones still in the queue are skipped
+        snapshot = None
+        try:
+            while True:
+                snapshot = weights_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if snapshot is not None:
+            weights, agent.epsilon = snapshot
+            agent.model.set_weights(weights)
+
+        transitions = []
+        episode_reward = play_episode(agent, env, agent_position, lambda *t: transitions.append(t))
+        states, actions, rewards, next_states, dones = (np.array(column) for column in zip(*transitions))
+        transitions_queue.put(((states, actions, rewards, next_states, dones), episode_reward, env.determine_winner_player(), agent_position))
+        agent_position = 1 - agent_position  # Flip every episode for equal training
+
+def train_actor_learner(episodes=5000, actors=None, sync_every=50, telemetry_path="model_saves/telemetry", checkpoint_dir="model_saves/checkpoint", resume=False, league_dir=None, league_every=1000):
+    """
+    Trains a DQN agent with actor processes generating games in parallel and this process learning continuously.
+    The learner sends a weight snapshot (and the current epsilon) to every actor every sync_every gradient steps.
+    Epsilon and beta still decay once per finished episode, as in train_agent. Returns the telemetry log's path.
+    The learner's state is checkpointed every 100 episodes; with resume, training continues from the newest checkpoint.
+    With league_dir, a snapshot of the model joins that league every league_every episodes.
+    """
+    actors = actors or max(1, (os.cpu_count() or 2) - 1)  # One core stays with the learner
+    agent = DQNAgent(15, 6)
+    checkpointer = Checkpointer(checkpoint_dir)
+    trainer_state = checkpointer.load(agent) if resume else None
+    context = multiprocessing.get_context("spawn")  # TensorFlow does not survive a fork
+    transitions_queue = context.Queue()
+    weights_queues = [context.Queue(maxsize=1) for _ in range(actors)]
+    stop_event = context.Event()
+    processes = [context.Process(target=_actor, args=(i, weights_queues[i], transitions_queue, stop_event), daemon=True) for i in range(actors)]
+    for process in processes:
+        process.start()
+
+    episode = trainer_state["episode"] if trainer_state else 0
+    telemetry = TrainingTelemetry(telemetry_path, resume_rows=episode)
+    league = League(league_dir) if league_dir else None
+    last_sync = agent.training_step
+
+    def publish_weights():
+        snapshot = (agent.model.get_weights(), agent.epsilon)
+        for weights_queue in weights_queues:
+            try:
+                weights_queue.put_nowait(snapshot)
+            except queue.Full:  # The actor has not picked up the previous snapshot yet
+                pass
+
+    publish_weights()
+    while episode < episodes:
+        # Store every episode that arrived meanwhile; wait for one only if there is nothing to train on yet
+        try:
+            message = transitions_queue.get(timeout=1.0) if agent.memory.size() < agent.batch_size else transitions_queue.get_nowait()
+        except queue.Empty:
+            message = None
+        while message is not None and episode < episodes:
+            (states, actions, step_rewards, next_states, dones), episode_reward, winner, agent_position = message
+            if agent.augment_swapped:
+                states, actions, step_rewards, next_states, dones = with_swapped(states, actions, step_rewards, next_states, dones)
+            agent.memory.store_batch(states, actions, step_rewards, next_states, dones, np.ones(len(actions)))  # New samples get high priority
+            agent.decay_exploration()
+            episode += 1
+            telemetry.record_episode(episode, episode_reward, winner, agent_position, agent)
+
+            # Save model periodically - Checkpoint
+            if episode % 100 == 0:
+                agent.save_model(f"model_saves/mancala_agent_saved.keras")
+                agent.export_weights("model_saves/mancala_agent_saved.npz") # For agent_testing.py, without TensorFlow
+                checkpointer.save(agent, {"episode": episode})
+            if league and episode % league_every == 0:
+                league.add_agent(agent, f"episode-{episode:07d}")
+            try:
+                message = transitions_queue.get_nowait()
+            except queue.Empty:
+                message = None
+
+        if agent.learn():
+            telemetry.record_td_errors(agent.last_td_errors)
+            if agent.training_step - last_sync >= sync_every:
+                publish_weights()
+                last_sync = agent.training_step
+
+    # Stop the actors. Their last episodes are drained so no process blocks on a full pipe while exiting
+    stop_event.set()
+    for weights_queue in weights_queues:
+        weights_queue.cancel_join_thread()
+    while any(process.is_alive() for process in processes):
+        try:
+            transitions_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    for process in processes:
+        process.join()
 
     # Save final model
+    checkpointer.wait()
+    telemetry.close()
     agent.save_model("model_saves/mancala_agent_final.keras")
 
-    return rewards, win_loss_history
+    return telemetry_path
 
-def plot_graph(rewards, win_loss_history):
-    """Plots the training rewards and win/loss/tie distribution."""
-    rewards = np.convolve(rewards, np.ones(200) / 200, 'valid')  # Smooth rewards over 200 episodes (moving average)
+def plot_graph(telemetry_path):
+    """Plots the training rewards and win/loss/tie distribution from a telemetry log."""
+    log = read_log(telemetry_path)
+    rewards = np.convolve(log["reward"], np.ones(200) / 200, 'valid')  # Smooth rewards over 200 episodes (moving average)
     plt.figure(figsize=(12, 6))
     plt.plot(rewards, label="Rewards", alpha=0.5)
     plt.title("Training Rewards with Moving Average (200 episodes)")
@@ -123,10 +254,10 @@ def plot_graph(rewards, win_loss_history):
     plt.show()
 
     # Plot win/loss/tie distribution over the last 200 episodes
-    win_loss_history = np.array(win_loss_history[-201:])
-    total_wins = win_loss_history[-1, 0] - win_loss_history[0, 0]
-    total_losses = win_loss_history[-1, 1] - win_loss_history[0, 1]
-    total_ties = win_loss_history[-1, 2] - win_loss_history[0, 2]
+    outcomes = log["outcome"][-200:]
+    total_wins = np.sum(outcomes == 1)
+    total_losses = np.sum(outcomes == -1)
+    total_ties = np.sum(outcomes == 0)
 
     categories = ["Wins", "Losses", "Ties"]
     values = [total_wins, total_losses, total_ties]
@@ -138,5 +269,20 @@ def plot_graph(rewards, win_loss_history):
     plt.show()
 
 if __name__ == "__main__":
-    rewards, win_loss_history = train_agent()
-    plot_graph(rewards, win_loss_history)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Trains the DQN agent against a random opponent.")
+    parser.add_argument("--episodes", type=int, default=5000)
+    parser.add_argument("--actors", type=int, default=0, help="Actor processes generating games for a separate learner (0 trains in a single loop)")
+    parser.add_argument("--telemetry", default="model_saves/telemetry", help="Directory of the streamed training metrics (see telemetry_viewer.py)")
+    parser.add_argument("--checkpoints", default="model_saves/checkpoint", help="Directory of the full trainer checkpoints")
+    parser.add_argument("--resume", action="store_true", help="Continue from the newest checkpoint instead of starting over")
+    parser.add_argument("--league", help="League directory that a model snapshot joins every --league-every episodes (see League.py)")
+    parser.add_argument("--league-every", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.actors > 0:
+        telemetry_path = train_actor_learner(args.episodes, args.actors, telemetry_path=args.telemetry, checkpoint_dir=args.checkpoints, resume=args.resume,
+                                             league_dir=args.league, league_every=args.league_every)
+    else:
+        telemetry_path = train_agent(args.episodes, telemetry_path=args.telemetry, checkpoint_dir=args.checkpoints, resume=args.resume,
+                                     league_dir=args.league, league_every=args.league_every)
+    plot_graph(telemetry_path)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+class MicroBatcher:
+    def __init__(self, run_batch, window_ms=2.0, max_batch_size=256, executor=None):
+        """
+        Coalesces single board states submitted within window_ms of each other into one batch.
+        run_batch receives a (N, 15) array and must return one row of outputs per input row.
+        If an executor is given, batches run on it so the next batch can be collected meanwhile.
+        """
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, state: np.ndarray) -> Future:
+        """Queues a single (15,) state and returns a future that resolves to its output row."""
+        future = Future()
+        self._queue.put((state, future))
+        return future
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the window closes or the batch is full."""
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                # Once the window has closed we still take whatever is already queued, but never wait for more
+                items.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _loop(self):
+        """Background thread: collect a batch, run it, hand each row back to its caller."""
+        while True:
+            items = self._collect()
+            self._flush(items)
+
+    def _flush(self, items):
+        """Runs one batch and resolves the futures of every request inside it."""
+        if self.executor is None:
+            self._run(items)
+        else:
+            self.executor.submit(self._run, items)
+
+    def _run(self, items):
+        """Stacks the inputs, runs the model and hands each output row back to its caller. Any failure fails the whole batch."""
+        try:
+            outputs = self.run_batch(np.stack([state for state, _ in items]))
+        except Exception as e: # A malformed input must not kill the batcher thread, which would hang every later request
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for row, (_, future) in zip(outputs, items):
+            future.set_result(row)
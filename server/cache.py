@@ -0,0 +1,81 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost of the OrderedDict itself (hash slot + linked-list node), on top of key and value
+_ENTRY_OVERHEAD = 100
+
+def _entry_size(key, value):
+    """Estimates the memory held by one cache entry."""
+    return sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+class BoardCache:
+    def __init__(self, max_entries=100_000, max_bytes=64 * 1024 * 1024, ttl_seconds=3600.0):
+        """
+        LRU cache of best-move rankings keyed on (model identity, canonical board).
+        Entries expire after ttl_seconds, and the least recently used ones are evicted once either
+        max_entries or max_bytes is exceeded. A max_entries of 0 disables the cache.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict() # key -> (expires_at, value, size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_id, state):
+        """Builds a cache key from the model identity and the 15 values of the canonical board."""
+        return (model_id, tuple(state))
+
+    def get(self, key):
+        """Returns the cached value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Stores value under key, evicting least recently used entries to stay within bounds."""
+        if self.max_entries <= 0:
+            return
+        size = _entry_size(key, value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        """Drops a single entry. The lock must be held."""
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        """Drops every entry but keeps the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and the current size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
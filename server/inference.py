@@ -0,0 +1,56 @@
+import hashlib
+import queue
+import numpy as np
+import onnxruntime as ort
+
+def model_identity(model_path):
+    """Returns a short content hash of the model file, so results cached for one model are never served for another."""
+    with open(model_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def make_session_options(intra_op_threads=1, inter_op_threads=1):
+    """Builds session options with pinned thread counts, so workers * intra_op_threads matches the core count."""
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    return options
+
+class SessionPool:
+    def __init__(self, model_path, size, intra_op_threads=1, inter_op_threads=1):
+        """
+        Holds one InferenceSession per executor worker. A worker checks a session out for the duration
+        of a call, so sessions are never shared between threads running at the same time.
+        """
+        options = make_session_options(intra_op_threads, inter_op_threads)
+        self.model_path = model_path
+        self.model_id = model_identity(model_path)
+        self.size = size
+        self._sessions = queue.Queue()
+        for _ in range(size):
+            self._sessions.put(ort.InferenceSession(model_path, sess_options=options))
+
+        # Why name is needed is because ONNX model can have multiple inputs and outputs. The output result from .run() is a list of output tensors.
+        # In our case, we only have 1 input tensor and 1 output tensor, so we can just get the first element of the list.
+        session = self._sessions.queue[0]
+        self.input_name = session.get_inputs()[0].name
+        self.output_name = session.get_outputs()[0].name
+
+    def warm_up(self, batch_sizes=(1,)):
+        """Runs every session once per batch size on a dummy batch, so the first real request does not pay for initialization."""
+        for _ in range(self.size):
+            session = self._sessions.get()
+            try:
+                for batch_size in batch_sizes:
+                    session.run([self.output_name], {self.input_name: np.zeros((batch_size, 15), dtype=np.float32)})
+            finally:
+                self._sessions.put(session)
+
+    def run(self, state: np.ndarray) -> np.ndarray:
+        """Runs a (N, 15) batch on a free session and returns the (N, 6) Q-values."""
+        session = self._sessions.get()
+        try:
+            outputs = session.run([self.output_name], {self.input_name: state.astype(np.float32)})
+            return outputs[0]
+        finally:
+            self._sessions.put(session)
@@ -1,9 +1,30 @@
 import os
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import onnxruntime as ort
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel
+from batching import MicroBatcher
+from registry import ModelRegistry, parse_models
+from cache import BoardCache
+from metrics import Metrics, request_started, request_timings, server_timing
+
+# The game rules and the precomputed tables are shared with the training code
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python-training-files"))
+from OpeningBook import OpeningBook
+from MancalaBoard import MancalaBoard, TOTAL_SEEDS
+from AlphaBeta import AlphaBetaSearch
+from MCTS import MCTSSearch
+from EndgameTablebase import EndgameTablebase
+from InferenceAgent import variant_path
+from Symmetry import agent_view, canonical_state
+from sessions import GameSession, HUMAN, AGENT
+import protocol
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -17,54 +38,439 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Path to the ONNX model file
-onnx_model_path = os.environ.get("MODEL_PATH", "public/assets/mancala_agent_final.onnx")
+# Path to the ONNX model file. MODEL_VARIANT picks one of the exports written next to it by keras_to_onnx.py
+# ("fp32", "optimized" or the INT8-quantized "int8")
+onnx_model_path = variant_path(os.environ.get("MODEL_PATH", "public/assets/mancala_agent_final.onnx"), os.environ.get("MODEL_VARIANT", "fp32"))
+
+# Concurrent /best_move/ requests arriving within this window (in milliseconds) are merged into a single ONNX call
+batch_window_ms = float(os.environ.get("BATCH_WINDOW_MS", "2"))
+max_batch_size = int(os.environ.get("MAX_BATCH_SIZE", "256"))
+
+# Inference runs on a dedicated executor instead of the event loop. Each worker gets its own session pinned to
+# ORT_INTRA_OP_THREADS / ORT_INTER_OP_THREADS threads, so the defaults use every core without oversubscribing them.
+intra_op_threads = int(os.environ.get("ORT_INTRA_OP_THREADS", "1"))
+inter_op_threads = int(os.environ.get("ORT_INTER_OP_THREADS", "1"))
+inference_workers = int(os.environ.get("INFERENCE_WORKERS", str(max(1, (os.cpu_count() or 1) // intra_op_threads))))
+executor = ThreadPoolExecutor(max_workers=inference_workers, thread_name_prefix="inference")
+
+# Repeated positions (the opening position above all) are answered from an LRU/TTL cache without touching the model
+cache = BoardCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "100000")),
+    max_bytes=int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get("CACHE_TTL_SECONDS", "3600")),
+)
+
+# Prometheus-style counters and latency histograms, scraped from /metrics. With SERVER_TIMING=1 every response carries
+# a Server-Timing header with its own stage timings; otherwise only requests sending "X-Server-Timing: 1" get one.
+metrics = Metrics()
+metrics.add_gauge("mancala_cache_hit_rate", "Share of cache lookups that were hits.", lambda: cache.stats()["hit_rate"])
+metrics.add_gauge("mancala_cache_hits_total", "Cache lookups that were hits.", lambda: cache.stats()["hits"], "counter")
+metrics.add_gauge("mancala_cache_misses_total", "Cache lookups that were misses.", lambda: cache.stats()["misses"], "counter")
+server_timing_always = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# Games played over /ws/game/, by session id
+game_sessions = {}
+metrics.add_gauge("mancala_game_sessions", "Open WebSocket game sessions.", lambda: len(game_sessions))
+
+# Named models (e.g. difficulty levels) from MODELS="easy=path,hard=path"; the first is the default. Without MODELS the
+# single model above is served as "default". Changed model files are reloaded without a restart.
+models = ModelRegistry(
+    parse_models(os.environ.get("MODELS"), onnx_model_path),
+    inference_workers, intra_op_threads, inter_op_threads,
+    warm_up_batches=(1, max_batch_size),
+    poll_seconds=float(os.environ.get("MODEL_POLL_SECONDS", "2")),
+)
+
+# Opening positions are answered from a memory-mapped book built by python-training-files/OpeningBook.py
+opening_book_path = os.environ.get("OPENING_BOOK_PATH", "public/assets/opening_book.bin")
+opening_book = None
+if os.path.exists(opening_book_path):
+    try:
+        # The book is only consulted for whichever model it was built with (see book_moves)
+        opening_book = OpeningBook(opening_book_path)
+    except Exception as e:
+        print(f"Error loading opening book: {e}")
+        opening_book = None
+
+# Positions with few seeds left are played perfectly from a memory-mapped tablebase built by EndgameTablebase.py
+tablebase_path = os.environ.get("ENDGAME_TABLEBASE_PATH", "public/assets/endgame_tablebase.bin")
+tablebase = None
+if os.path.exists(tablebase_path):
+    try:
+        tablebase = EndgameTablebase(tablebase_path)
+    except Exception as e:
+        print(f"Error loading endgame tablebase: {e}")
+
+# "strong" requests are answered by an alpha-beta search with this budget instead of a single forward pass
+search_time_ms = float(os.environ.get("SEARCH_TIME_MS", "200"))
+search_table_entries = int(os.environ.get("SEARCH_TABLE_ENTRIES", "1000000"))
+# Searches (alpha-beta and MCTS) run for up to their whole time budget, so they get their own bounded executor: on the inference executor,
+# fast-mode batches would queue behind them
+search_workers = int(os.environ.get("SEARCH_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+search_executor = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="search")
+# Every search thread keeps its own search engine, so transposition tables are reused but never shared
+search_engines = threading.local()
+# "mcts" requests run a Monte Carlo tree search whose leaves are evaluated in batches by the model
+mcts_simulations = int(os.environ.get("MCTS_SIMULATIONS", "800"))
+mcts_time_ms = float(os.environ.get("MCTS_TIME_MS", "200"))
+mcts_batch_size = int(os.environ.get("MCTS_BATCH_SIZE", "32"))
+mcts_threads = int(os.environ.get("MCTS_THREADS", "2"))
+MODES = ("fast", "strong", "mcts")
 
-# Initialize ONNX Runtime session
-try:
-    # Load the ONNX model and get input/output names
-    # Why name is needed is because ONNX model can have multiple inputs and outputs. The output result from .run() is a list of output tensors.
-    # In our case, we only have 1 input tensor and 1 output tensor, so we can just get the first element of the list.
-    session = ort.InferenceSession(onnx_model_path)
-    input_name = session.get_inputs()[0].name
-    output_name = session.get_outputs()[0].name
-except Exception as e:
-    print(f"Error loading ONNX model: {e}")
+# A client's board holding more than TOTAL_SEEDS (or a negative pit) is not a position of this game. The frontend's
+# rules conserve seeds, but the shared engine (MancalaBoard, MancalaEnv) keeps the original capture rule, which counts
+# some seeds twice, so boards the server itself plays (WebSocket sessions) can hold more and are not capped.
 
 # Define the pydantic model for incoming board state
 class BoardState(BaseModel):
     state: list
+    mode: str = "fast" # "fast" ranks moves with the model, "strong" and "mcts" search the position
+    model: str | None = None # Name of the model to use, the default one if omitted
+
+# Define the pydantic model for a batch of board states
+class BoardStates(BaseModel):
+    states: list
+    model: str | None = None
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Counts every request and times it end to end, collecting the stage timings recorded while it is handled."""
+    start = time.perf_counter()
+    timings = {}
+    request_started.set(start)
+    request_timings.set(timings) # The handler adds to this same dict, even though it runs in its own task
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.errors.inc("unhandled")
+        raise
+    elapsed = time.perf_counter() - start
+
+    # Routes, not raw paths, so unknown URLs cannot grow the number of series
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    metrics.requests.inc(endpoint, str(response.status_code))
+    metrics.request_seconds.observe(elapsed, endpoint)
+    if response.status_code == 422:
+        metrics.errors.inc("validation")
+
+    if server_timing_always or request.headers.get("x-server-timing") == "1":
+        timings["total"] = elapsed
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
+def request_error(status_code, kind, detail):
+    """Counts a failed request under kind and returns the HTTPException to raise."""
+    metrics.errors.inc(kind)
+    return HTTPException(status_code=status_code, detail=detail)
 
 @app.get("/")
 def read_root():
     return {"message": "Mancala Agent API"}
 
-def predict_onnx(state: np.ndarray) -> np.ndarray:
-    """Perform inference using ONNX Runtime."""
-    outputs = session.run([output_name], {input_name: state.astype(np.float32)})
-    return outputs[0] # outputs is a list of output tensors, we only have 1 output tensor which is act_values ([1, 6])
+def predict_onnx(state: np.ndarray, model: str = None) -> np.ndarray:
+    """Perform inference using ONNX Runtime. Blocks, so it should only be called from the executor."""
+    # The pool is looked up per call, so a reloaded model is picked up by the next batch
+    pool = models.get(model)
+    metrics.batch_size.observe(len(state), model or models.default)
+    start = time.perf_counter()
+    act_values = pool.run(state) # act_values ([N, 6])
+    metrics.stage_seconds.observe(time.perf_counter() - start, "session_run")
+    return act_values
 
-@app.post("/best_move/")
-def get_best_move(board_state: BoardState):
+async def predict_async(state: np.ndarray, model: str = None) -> np.ndarray:
+    """Runs inference on the executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, predict_onnx, state, model)
+
+# The models are exported with a dynamic batch dimension, so single requests for the same model share one session.run call
+batchers = {
+    name: MicroBatcher(lambda batch, name=name: predict_onnx(batch, name), window_ms=batch_window_ms, max_batch_size=max_batch_size, executor=executor)
+    for name in models.names()
+}
+
+def resolve_model(name):
+    """Returns the model name and its current session pool, or raises a 404/503 for unknown or unavailable models."""
+    name = models.default if name is None else name
+    if name not in batchers:
+        raise request_error(404, "unknown_model", f"Unknown model '{name}'")
+    pool = models.get(name)
+    if pool is None:
+        raise request_error(503, "model_unavailable", f"Model '{name}' is not loaded")
+    return name, pool
+
+def book_moves(state, model_id):
+    """Looks a position up in the opening book, if the book was built for this model."""
+    if opening_book is None or opening_book.model_id != model_id:
+        return None
+    with metrics.stage("book"):
+        return opening_book.lookup(state)
+
+def tablebase_moves(state):
+    """Ranks an endgame position exactly from the tablebase, or returns None if it is not covered (or there is none)."""
+    if tablebase is None:
+        return None
+    with metrics.stage("tablebase"):
+        return tablebase.best_moves(MancalaBoard.from_state(state))
+
+def prepare_state(state: list, external: bool = True) -> tuple:
+    """
+    Validates a board state as the frontend sends it (the agent's pits at 7-12, the last value the seat the agent
+    plays) and returns it in the agent's own perspective (see Symmetry.agent_view), the form the model was trained on
+    and the search root, as a list and as the array the model takes. Only external (client) boards are held to the
+    game's seed total.
+    """
     # Validate board shape
-    if len(board_state.state) != 15:
-        raise HTTPException(status_code=400, detail="Input shape must be (15,)")
-    
-    # Switch board positions between player 0 and player 1 if needed
-    if board_state.state[-1] == 0:
-        for i in range(7):
-            board_state.state[i], board_state.state[i + 7] = board_state.state[i + 7], board_state.state[i]
-    
+    if not isinstance(state, list) or len(state) != 15:
+        raise request_error(400, "invalid_state", "Input shape must be (15,)")
+    if not all(isinstance(v, int) and not isinstance(v, bool) or isinstance(v, float) and v.is_integer() for v in state):
+        raise request_error(400, "invalid_state", "Board values must be whole numbers")
+    if min(state[:14]) < 0:
+        raise request_error(400, "invalid_state", "Pit counts must be non-negative")
+    if external and sum(state[:14]) > TOTAL_SEEDS:
+        raise request_error(400, "invalid_state", f"Pit counts must hold at most {TOTAL_SEEDS} seeds in total")
+    if state[14] not in (0, 1):
+        raise request_error(400, "invalid_state", "The player to move must be 0 or 1")
+
+    # An agent playing seat 0 has its pits at 0-5 in training: swap the halves, keep the seat
+    with metrics.stage("swap"):
+        state = agent_view([int(v) for v in state]).tolist()
+
+    with metrics.stage("to_array"):
+        return state, np.array(state)
+
+def search_best_moves(state: list, act_values: np.ndarray) -> list:
+    """Searches the position with this thread's engine. Blocks, so it should only be called from the search executor."""
+    engine = getattr(search_engines, "engine", None)
+    if engine is None:
+        engine = search_engines.engine = AlphaBetaSearch(search_table_entries, tablebase)
+    result = engine.search(MancalaBoard.from_state(state), q_values=act_values, time_ms=search_time_ms)
+    return result.best_moves
+
+def mcts_best_moves(state: list, act_values: np.ndarray, model: str) -> list:
+    """
+    Runs a Monte Carlo tree search on the position, its leaves batched through the model's session pool. Blocks, so it
+    should only be called from the search executor.
+    """
+    engine = MCTSSearch(lambda states: predict_onnx(states, model), tablebase, mcts_batch_size, mcts_threads)
+    result = engine.search(MancalaBoard.from_state(state), mcts_simulations, mcts_time_ms, q_values=act_values)
+    return result.best_moves
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache_stats/")
+def get_cache_stats():
+    return cache.stats()
+
+@app.get("/models/")
+def get_models():
+    return models.stats()
+
+async def best_move(state: list, mode: str = "fast", model: str = None, external: bool = True) -> list:
+    """
+    Ranks the moves (local indices) of one board state, shared by the JSON, binary and WebSocket endpoints. external
+    is False for the server's own boards (see prepare_state).
+    """
+    if mode not in MODES:
+        raise request_error(400, "invalid_mode", "Mode must be 'fast', 'strong' or 'mcts'")
+    model, pool = resolve_model(model)
+    state, state_array = prepare_state(state, external)
+
+    # Endgame positions have an exact answer whatever the mode
+    best_moves = tablebase_moves(state)
+    if best_moves is not None:
+        metrics.answers.inc("tablebase")
+        return best_moves
+
+    if mode != "fast":
+        # The model's Q-values order the root moves (or are the root's priors), then the search runs on its executor.
+        # The state is validated, so a failure here is a server error and is reported (and counted) as one.
+        with metrics.stage("inference"):
+            act_values = await asyncio.wrap_future(batchers[model].submit(state_array))
+        loop = asyncio.get_running_loop()
+        if mode == "strong":
+            with metrics.stage("search"):
+                best_moves = await loop.run_in_executor(search_executor, search_best_moves, state, act_values)
+            metrics.answers.inc("search")
+        else:
+            with metrics.stage("mcts"):
+                best_moves = await loop.run_in_executor(search_executor, mcts_best_moves, state, act_values, model)
+            metrics.answers.inc("mcts")
+        return best_moves
+
+    # Book positions need neither the cache nor the model
+    best_moves = book_moves(state, pool.model_id)
+    if best_moves is not None:
+        metrics.answers.inc("book")
+        return best_moves
+
+    # Both sides of the same position share one entry (see Symmetry.py)
+    with metrics.stage("cache"):
+        key = BoardCache.make_key(pool.model_id, canonical_state(state))
+        best_moves = cache.get(key)
+    if best_moves is not None:
+        metrics.answers.inc("cache")
+        return list(best_moves)
+
     try:
-        # Reshape input into a 2D array
-        state_array = np.array(board_state.state).reshape(1, -1)
-        
-        # Run inference
-        act_values = predict_onnx(state_array)
-        
+        # Run inference, possibly together with other concurrent requests (includes the wait for the batch to fill)
+        with metrics.stage("inference"):
+            act_values = await asyncio.wrap_future(batchers[model].submit(state_array))
+
         # Get best moves by sorting output predictions
-        best_moves = np.argsort(act_values[0])[::-1].tolist()
-        
-        return {"best_moves": best_moves}
+        with metrics.stage("argsort"):
+            best_moves = np.argsort(act_values)[::-1].tolist()
+        cache.put(key, tuple(best_moves))
+
+        metrics.answers.inc("model")
+        return best_moves
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
\ No newline at end of file
+        raise request_error(500, "prediction", f"Prediction error: {str(e)}")
+
+@app.post("/best_move/")
+async def get_best_move(board_state: BoardState):
+    metrics.mark_parsed()
+    return {"best_moves": await best_move(board_state.state, board_state.mode, board_state.model)}
+
+@app.post("/best_move/binary/")
+async def get_best_move_binary(request: Request, mode: str = "fast", model: str | None = None):
+    """Same as /best_move/ with a 15-byte board as the body (see protocol.py); answers with the 6 ranked moves as bytes."""
+    try:
+        boards = protocol.decode_boards(await request.body())
+    except ValueError as e:
+        raise request_error(400, "invalid_state", str(e))
+    if len(boards) != 1:
+        raise request_error(400, "invalid_state", "Exactly one board is expected, use /best_moves/batch/binary/ for more")
+    metrics.mark_parsed()
+    return Response(protocol.encode_moves(await best_move(boards[0].tolist(), mode, model)), media_type=protocol.MEDIA_TYPE)
+
+async def best_moves_batch(states: list, state_array: np.ndarray, model: str, pool) -> list:
+    """
+    Ranks the moves of many board states already switched to the agent's perspective (as lists and as one (N, 15) array),
+    shared by the JSON and binary batch endpoints.
+    """
+    # Endgame positions are answered exactly, as single requests are; only positions missing from the tablebase,
+    # the opening book and the cache are sent to the model
+    keys = [BoardCache.make_key(pool.model_id, canonical_state(state)) for state in states]
+    best_moves = [tablebase_moves(state) for state in states]
+    tablebase_hits = sum(moves is not None for moves in best_moves)
+    best_moves = [moves if moves is not None else book_moves(state, pool.model_id) for moves, state in zip(best_moves, states)]
+    book_hits = sum(moves is not None for moves in best_moves) - tablebase_hits
+    with metrics.stage("cache"):
+        best_moves = [moves if moves is not None else cache.get(key) for moves, key in zip(best_moves, keys)]
+    missing = [i for i, moves in enumerate(best_moves) if moves is None]
+    metrics.answers.inc("tablebase", amount=tablebase_hits)
+    metrics.answers.inc("book", amount=book_hits)
+    metrics.answers.inc("cache", amount=len(best_moves) - len(missing) - book_hits - tablebase_hits)
+
+    try:
+        if missing:
+            # The whole batch goes through a single session.run call
+            with metrics.stage("inference"):
+                act_values = await predict_async(state_array[missing], model)
+            with metrics.stage("argsort"):
+                rows = np.argsort(act_values, axis=1)[:, ::-1].tolist()
+            for i, row in zip(missing, rows):
+                best_moves[i] = row
+                cache.put(keys[i], tuple(row))
+            metrics.answers.inc("model", amount=len(missing))
+
+        return [list(moves) for moves in best_moves]
+    except Exception as e:
+        raise request_error(500, "prediction", f"Prediction error: {str(e)}")
+
+@app.post("/best_moves/batch/")
+async def get_best_moves_batch(board_states: BoardStates):
+    metrics.mark_parsed()
+    if not board_states.states:
+        raise request_error(400, "invalid_state", "At least one board state is required")
+    model, pool = resolve_model(board_states.model)
+    states, arrays = zip(*(prepare_state(state) for state in board_states.states))
+    return {"best_moves": await best_moves_batch(list(states), np.stack(arrays), model, pool)}
+
+@app.post("/best_moves/batch/binary/")
+async def get_best_moves_batch_binary(request: Request, model: str | None = None):
+    """Same as /best_moves/batch/ with N boards of 15 bytes laid end to end as the body; answers with N * 6 bytes."""
+    try:
+        boards = protocol.decode_boards(await request.body())
+    except ValueError as e:
+        raise request_error(400, "invalid_state", str(e))
+    metrics.mark_parsed()
+    model, pool = resolve_model(model)
+    with metrics.stage("swap"):
+        state_array = agent_view(boards)
+    with metrics.stage("to_array"):
+        states = state_array.tolist() # Plain ints for the cache keys and the book
+    best_moves = await best_moves_batch(states, state_array, model, pool)
+    return Response(protocol.encode_moves(best_moves), media_type=protocol.MEDIA_TYPE)
+
+async def warm_cache(positions, model):
+    """Computes the agent's answers to the given positions in one batch, so they are cache hits once the human has moved."""
+    try:
+        model, pool = resolve_model(model)
+        state_array = agent_view(np.array(positions))
+        await best_moves_batch(state_array.tolist(), state_array, model, pool)
+    except Exception: # Only an optimization; the real request computes the answer itself if this failed
+        pass
+
+async def play_agent_turns(websocket: WebSocket, session: GameSession, mode: str, model: str):
+    """Plays the agent's moves while it is to move (several in a row after extra turns), sending each one."""
+    while not session.done and session.to_move == AGENT:
+        ranked = await best_move(session.state(), mode, model, external=False) # The session's own board
+        pit = next(move + 7 * AGENT for move in ranked if session.env.is_valid_move(move + 7 * AGENT))
+        session.play(pit)
+        await websocket.send_json({"type": "move", "player": "agent", "move": pit})
+
+@app.websocket("/ws/game/")
+async def game_session(websocket: WebSocket, mode: str = "fast", model: str | None = None, agent_first: bool = False):
+    """
+    A whole game over one connection. The server keeps the board; the client sends {"move": pit} with one of its pits
+    (0-5) and gets the agent's replies ({"type": "move", ...}) followed by the new state ({"type": "state", ...}).
+    Illegal moves get {"type": "error", ...} and change nothing. While the human is thinking, the agent's answers to
+    every possible human move are computed in the background (fast mode), so the reply usually comes from the cache.
+    """
+    await websocket.accept()
+    try:
+        if mode not in MODES:
+            raise request_error(400, "invalid_mode", "Mode must be 'fast', 'strong' or 'mcts'")
+        resolve_model(model)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+
+    session = GameSession(agent_first)
+    game_sessions[session.id] = session
+    prefetch = None
+    try:
+        while True:
+            await play_agent_turns(websocket, session, mode, model)
+            await websocket.send_json(session.message())
+            if session.done:
+                break
+            if mode == "fast":
+                prefetch = asyncio.create_task(warm_cache(session.human_replies(), model))
+
+            # Wait for a legal human move
+            while True:
+                try:
+                    pit = (await websocket.receive_json()).get("move")
+                except (ValueError, AttributeError):
+                    await websocket.send_json({"type": "error", "detail": 'Messages must look like {"move": pit}'})
+                    continue
+                if session.to_move == HUMAN and session.play(pit):
+                    break
+                metrics.errors.inc("illegal_move")
+                await websocket.send_json({"type": "error", "detail": f"Illegal move {pit!r}"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1011)
+    finally:
+        if prefetch is not None:
+            prefetch.cancel()
+        game_sessions.pop(session.id, None)
@@ -0,0 +1,134 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from 50 microseconds (a cache hit) up to 5 seconds (a long search)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Per-request stage timings, filled in while a request is handled and sent back in the Server-Timing header
+request_timings = contextvars.ContextVar("request_timings", default=None)
+# perf_counter() when the current request reached the server, so handlers can tell how long parsing took
+request_started = contextvars.ContextVar("request_started", default=None)
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        """A monotonically increasing count per label combination, in the Prometheus text format."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        """Cumulative bucket counts, sum and count per label combination, in the Prometheus text format."""
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {} # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ("le",), label_values + (repr(float(bound)),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-2]}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, help, read, type="gauge"):
+        """A single value read at scrape time by calling read(). type is "counter" for values kept elsewhere that only grow."""
+        self.name = name
+        self.help = help
+        self.read = read
+        self.type = type
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.append(f"{self.name} {self.read()}")
+        return lines
+
+class Metrics:
+    def __init__(self):
+        """Every metric the API exposes at /metrics."""
+        self.requests = Counter("mancala_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+        self.errors = Counter("mancala_errors_total", "Failed requests by error kind.", ("kind",))
+        self.request_seconds = Histogram("mancala_request_seconds", "End-to-end request latency.", ("endpoint",))
+        self.stage_seconds = Histogram("mancala_stage_seconds", "Latency of each stage of answering a request.", ("stage",))
+        self.batch_size = Histogram("mancala_inference_batch_size", "Rows per session.run call.", ("model",), BATCH_SIZE_BUCKETS)
+        self.answers = Counter("mancala_answers_total", "Best-move answers by where they came from.", ("source",))
+        self._gauges = []
+
+    def add_gauge(self, name, help, read, type="gauge"):
+        self._gauges.append(Gauge(name, help, read, type))
+
+    @contextmanager
+    def stage(self, name):
+        """Times a block as one stage, both in the histogram and in the current request's timings."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def mark_parsed(self):
+        """Records the time from the request's arrival until its handler started (body read and validation) as "parse"."""
+        started = request_started.get()
+        if started is not None:
+            self.observe_stage("parse", time.perf_counter() - started)
+
+    def observe_stage(self, name, seconds):
+        self.stage_seconds.observe(seconds, name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.errors, self.request_seconds, self.stage_seconds, self.batch_size, self.answers, *self._gauges):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+def server_timing(timings):
+    """Formats stage timings (in seconds) as a Server-Timing header value (in milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
@@ -0,0 +1,23 @@
+import numpy as np
+from MancalaBoard import TOTAL_SEEDS
+
+# Binary protocol: a board is 15 bytes (14 pit counts and the agent's seat as in a JSON request, one uint8 each),
+# and an answer is the 6 local moves ranked best first, one byte each. Batches are boards laid end to end.
+BOARD_BYTES = 15
+MOVES_BYTES = 6
+MEDIA_TYPE = "application/octet-stream"
+
+def decode_boards(body: bytes) -> np.ndarray:
+    """Returns a read-only (N, 15) uint8 view of a request body (no copy), or raises ValueError if it is malformed."""
+    if not body or len(body) % BOARD_BYTES:
+        raise ValueError(f"Body must hold one or more boards of {BOARD_BYTES} bytes, got {len(body)} bytes")
+    boards = np.frombuffer(body, dtype=np.uint8).reshape(-1, BOARD_BYTES)
+    if (boards[:, 14] > 1).any():
+        raise ValueError("The seat byte of every board must be 0 or 1")
+    if (boards[:, :14].sum(axis=1) > TOTAL_SEEDS).any():
+        raise ValueError(f"A board holds at most {TOTAL_SEEDS} seeds")
+    return boards
+
+def encode_moves(rankings) -> bytes:
+    """Packs move rankings (one list of 6 local moves per board) into 6 bytes per board."""
+    return np.asarray(rankings, dtype=np.uint8).tobytes()
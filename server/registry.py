@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from inference import SessionPool
+
+def parse_models(spec, default_path):
+    """Parses MODELS ("name=path,name=path") into an ordered dict. Without a spec, the single model is called "default"."""
+    if not spec:
+        return {"default": default_path}
+    models = {}
+    for entry in spec.split(","):
+        name, _, path = entry.partition("=")
+        if not name.strip() or not path.strip():
+            raise ValueError(f"Invalid MODELS entry {entry!r}, expected name=path")
+        models[name.strip()] = path.strip()
+    return models
+
+def _file_version(path):
+    """Changes whenever the file is replaced or rewritten."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+class ModelRegistry:
+    def __init__(self, models, pool_size, intra_op_threads=1, inter_op_threads=1, warm_up_batches=(1,), poll_seconds=2.0):
+        """
+        Holds one warmed-up SessionPool per named model. Requests look their model up on every call, so replacing
+        an entry is atomic: calls already running keep the pool they started with, new calls get the new one.
+        A background thread reloads a model once its file has changed and stayed unchanged for one poll interval,
+        building and warming the new pool before swapping it in. A model that fails to load keeps its previous pool.
+        """
+        self.paths = dict(models)
+        self.default = next(iter(self.paths))
+        self._pool_args = (pool_size, intra_op_threads, inter_op_threads)
+        self._warm_up_batches = warm_up_batches
+        self._pools = {}
+        self._versions = {}
+        self.loaded_at = {}
+        for name in self.paths:
+            try:
+                self._load(name)
+            except Exception as e:
+                print(f"Error loading ONNX model {name!r} from {self.paths[name]}: {e}")
+
+        self.poll_seconds = poll_seconds
+        if poll_seconds > 0:
+            threading.Thread(target=self._watch, name="model-reloader", daemon=True).start()
+
+    def _load(self, name):
+        """Builds and warms a new pool for the model, then swaps it in."""
+        path = self.paths[name]
+        version = _file_version(path)
+        pool = SessionPool(path, *self._pool_args)
+        pool.warm_up(self._warm_up_batches)
+        self._pools[name] = pool # A single assignment, so readers see either the old pool or the new one
+        self._versions[name] = version
+        self.loaded_at[name] = time.time()
+
+    def names(self):
+        return list(self.paths)
+
+    def get(self, name=None):
+        """Returns the current pool of a model (the default one if name is None), or None if it is unknown or not loaded."""
+        return self._pools.get(self.default if name is None else name)
+
+    def _watch(self):
+        """Background thread: polls the model files and reloads the ones that changed."""
+        pending = {}
+        while True:
+            time.sleep(self.poll_seconds)
+            for name, path in self.paths.items():
+                try:
+                    version = _file_version(path)
+                except OSError: # Missing while it is being replaced
+                    continue
+                if version == self._versions.get(name):
+                    pending.pop(name, None)
+                elif pending.get(name) != version:
+                    pending[name] = version # Wait one more interval, in case the file is still being written
+                else:
+                    try:
+                        self._load(name)
+                        print(f"Reloaded ONNX model {name!r} from {path}")
+                    except Exception as e:
+                        print(f"Error reloading ONNX model {name!r} from {path}: {e}")
+                        self._versions[name] = version # Do not retry until the file changes again
+                    pending.pop(name, None)
+
+    def stats(self):
+        """Describes every configured model."""
+        return {
+            name: {
+                "path": path,
+                "loaded": name in self._pools,
+                "model_id": self._pools[name].model_id if name in self._pools else None,
+                "loaded_at": self.loaded_at.get(name),
+                "default": name == self.default,
+            }
+            for name, path in self.paths.items()
+        }
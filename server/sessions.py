@@ -0,0 +1,70 @@
+import itertools
+from MancalaEnv import MancalaEnv
+
+# As in the frontend, the human plays pits 0-5 (player 0) and the agent pits 7-12 (player 1)
+HUMAN, AGENT = 0, 1
+
+class GameSession:
+    _ids = itertools.count(1)
+
+    def __init__(self, agent_first=False):
+        """
+        Server-side state of one game played over a WebSocket, following the MancalaEnv rules. The client only
+        sends the pit it plays; the session validates it and keeps the board, so nothing else crosses the wire.
+        """
+        self.id = next(self._ids)
+        self.env = MancalaEnv(agent_position=AGENT)
+        if agent_first:
+            self.env.current_player = AGENT
+        self.moves = 0
+
+    @property
+    def done(self):
+        return self.env.done
+
+    @property
+    def to_move(self):
+        return self.env.current_player
+
+    def state(self):
+        """The 15-value state (14 pits and the side to move), as /best_move/ takes it."""
+        return self.env.get_state().tolist()
+
+    def play(self, pit):
+        """Plays a board index for the side to move. Returns False (and changes nothing) if the move is illegal or the game is over."""
+        if self.done or not isinstance(pit, int) or isinstance(pit, bool) or not self.env.is_valid_move(pit):
+            return False
+        self.env.make_move(pit)
+        self.moves += 1
+        # The game ends as soon as the side to move has no seeds left
+        if self.env.core.side_empty():
+            self.env.make_move(0)
+        return True
+
+    def human_replies(self):
+        """
+        The positions the agent would have to answer after each legal human move (human moves that earn another turn
+        are skipped), so their answers can be computed while the human is thinking.
+        """
+        if self.done or self.to_move != HUMAN:
+            return []
+        positions = []
+        for pit in self.env.available_actions():
+            board = self.env.core.copy()
+            board.play(pit)
+            if board.player == AGENT and not board.side_empty():
+                positions.append(list(board.pits) + [board.player])
+        return positions
+
+    def message(self):
+        """The game as sent to the client after every change."""
+        winner = self.env.determine_winner_player() if self.done else None
+        return {
+            "type": "state",
+            "session": self.id,
+            "state": self.state(),
+            "to_move": "human" if self.to_move == HUMAN else "agent",
+            "legal_moves": [] if self.done else list(self.env.available_actions()),
+            "done": self.done,
+            "winner": None if not self.done else ("tie" if winner is None else ("human" if winner == HUMAN else "agent")),
+        }
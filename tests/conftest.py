@@ -0,0 +1,18 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# The server and the training code are plain script directories, imported the way their own entry points do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "python-training-files"))
+sys.path.insert(0, os.path.join(ROOT, "server"))
+
+@pytest.fixture
+def transitions():
+    """Makes count random replay transitions (states, actions, rewards, next states, dones) with their priorities."""
+    def make(count, seed=0):
+        rng = np.random.default_rng(seed)
+        return (rng.integers(0, 48, (count, 15)), rng.integers(0, 6, count), rng.random(count).astype(np.float32),
+                rng.integers(0, 48, (count, 15)), rng.random(count) < 0.1, rng.random(count))
+    return make
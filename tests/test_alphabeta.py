@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from AlphaBeta import AlphaBetaSearch
+from MancalaBoard import MancalaBoard
+
+def minimax(board, depth):
+    """Plain negamax without pruning or a table, scored the way AlphaBetaSearch scores positions."""
+    if board.side_empty():
+        return AlphaBetaSearch._final_score(board)
+    if depth == 0:
+        return AlphaBetaSearch._evaluate(board)
+    best = None
+    for move in board.legal_moves():
+        child = board.copy()
+        extra_turn, _ = child.play(move)
+        score = minimax(child, depth - 1) if extra_turn else -minimax(child, depth - 1)
+        best = score if best is None else max(best, score)
+    return best
+
+def random_positions(seed, count, plies=(4, 30)):
+    """Positions reached by random play."""
+    rng = np.random.default_rng(seed)
+    positions = []
+    while len(positions) < count:
+        board = MancalaBoard()
+        for _ in range(rng.integers(*plies)):
+            if board.side_empty():
+                break
+            moves = board.legal_moves()
+            board.play(moves[rng.integers(len(moves))])
+        if not board.side_empty():
+            positions.append(board)
+    return positions
+
+@pytest.mark.parametrize("depth", [1, 2, 4])
+def test_fixed_depth_score_matches_minimax(depth):
+    engine = AlphaBetaSearch()
+    for board in random_positions(depth, 40):
+        result = engine.search(board, max_depth=depth, max_nodes=None)
+        assert result.depth == depth
+        assert result.score == minimax(board, depth)
+
+def test_best_move_is_ranked_first():
+    engine = AlphaBetaSearch()
+    for board in random_positions(7, 20):
+        result = engine.search(board, max_depth=3, max_nodes=None)
+        base = 7 * board.player
+        scores = {}
+        for move in board.legal_moves():
+            child = board.copy()
+            extra_turn, _ = child.play(move)
+            scores[move - base] = minimax(child, 2) if extra_turn else -minimax(child, 2)
+        assert scores[result.best_moves[0]] == max(scores.values())
+        assert sorted(result.best_moves) == list(range(6))
+
+def test_forced_move_is_searched():
+    # Only pit 12 is legal for player 1; the score is the forced move's value, not 0
+    board = MancalaBoard([1, 2, 0, 3, 0, 1, 10, 0, 0, 0, 0, 0, 3, 20], 1)
+    result = AlphaBetaSearch().search(board, max_depth=3, max_nodes=None)
+    assert result.best_moves[0] == 5
+    assert result.depth == 3
+    child = board.copy()
+    extra_turn, _ = child.play(12)
+    assert result.score == (minimax(child, 2) if extra_turn else -minimax(child, 2))
+
+def test_default_budget_ends_the_search():
+    result = AlphaBetaSearch().search(MancalaBoard())
+    assert 0 < result.depth < 60
+    assert result.nodes < 1_100_000
+
+def test_first_iteration_completes_under_any_budget():
+    result = AlphaBetaSearch().search(MancalaBoard(), max_nodes=1, time_ms=0)
+    assert result.depth >= 1
+    assert sorted(result.best_moves) == list(range(6))
+
+def test_finished_position_scores_the_final_result():
+    board = MancalaBoard([0] * 6 + [20] + [1, 0, 0, 0, 0, 0] + [27], 0)
+    result = AlphaBetaSearch().search(board)
+    assert result.score == AlphaBetaSearch._final_score(board) < 0
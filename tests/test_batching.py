@@ -0,0 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from batching import MicroBatcher
+
+def double(batch):
+    return batch * 2
+
+@pytest.mark.parametrize("executor", [None, ThreadPoolExecutor(1)])
+def test_rows_are_returned_to_their_callers(executor):
+    batcher = MicroBatcher(double, window_ms=5, executor=executor)
+    futures = [batcher.submit(np.full(15, i)) for i in range(10)]
+    for i, future in enumerate(futures):
+        assert (future.result(timeout=5) == 2 * i).all()
+
+@pytest.mark.parametrize("executor", [None, ThreadPoolExecutor(1)])
+def test_bad_shape_fails_its_batch_but_not_the_batcher(executor):
+    batcher = MicroBatcher(double, window_ms=50, executor=executor)
+    good, bad = batcher.submit(np.zeros(15)), batcher.submit(np.zeros(3))
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    with pytest.raises(ValueError): # Same batch
+        good.result(timeout=5)
+
+    # The batcher thread survived: later requests are still answered
+    assert (batcher.submit(np.ones(15)).result(timeout=5) == 2).all()
@@ -0,0 +1,61 @@
+import numpy as np
+from MancalaBoard import MancalaBoard
+
+def reference_play(pits, player, action):
+    """The original engine's move, one seed at a time. Returns (pits, player, extra_turn, captured)."""
+    pits = list(pits)
+    store, opponent_store = (6, 13) if player == 0 else (13, 6)
+    seeds, pits[action] = pits[action], 0
+    idx, captured = action, 0
+    for _ in range(seeds):
+        idx = (idx + 1) % 14
+        if idx == opponent_store:
+            idx = (idx + 1) % 14
+        pits[idx] += 1
+        captured += idx == store
+    if idx == store:
+        return pits, player, True, captured
+    if pits[idx] == 1 and pits[12 - idx] > 0 and idx // 7 == player:
+        captured += pits[12 - idx] + 1
+        pits[store] += captured
+        pits[12 - idx] = pits[idx] = 0
+    return pits, 1 - player, False, captured
+
+def random_positions(rng, count):
+    """Random boards, including pits with more than 13 seeds so that sowing laps the board."""
+    for _ in range(count):
+        pits = rng.integers(0, 4, 14) * rng.integers(0, 8, 14)
+        yield MancalaBoard(pits.tolist(), int(rng.integers(2)))
+
+def test_play_matches_the_reference_engine():
+    rng = np.random.default_rng(0)
+    for board in random_positions(rng, 3_000):
+        for move in board.legal_moves():
+            child = board.copy()
+            extra_turn, captured = child.play(move)
+            pits, player, expected_extra, expected_captured = reference_play(board.pits, board.player, move)
+            assert list(child.pits) == pits
+            assert (child.player, extra_turn, captured) == (player, expected_extra, expected_captured)
+
+def test_legal_moves_and_side_empty():
+    rng = np.random.default_rng(1)
+    for board in random_positions(rng, 1_000):
+        base = 7 * board.player
+        expected = tuple(pit for pit in range(base, base + 6) if board.pits[pit] > 0)
+        assert board.legal_moves() == expected
+        assert board.side_empty() == (not expected)
+        assert all(board.is_legal(pit) == (pit in expected) for pit in range(-1, 15))
+
+def test_key_identifies_the_position():
+    rng = np.random.default_rng(2)
+    boards = list(random_positions(rng, 2_000))
+    keys = {}
+    for board in boards:
+        keys.setdefault(board.key(), set()).add((tuple(board.pits), board.player))
+    assert all(len(positions) == 1 for positions in keys.values())
+
+def test_sweep_and_winner():
+    board = MancalaBoard([1, 0, 0, 0, 0, 2, 10, 0, 3, 0, 0, 0, 4, 9], 0)
+    board.sweep()
+    assert list(board.pits) == [0] * 6 + [13] + [0] * 6 + [16]
+    assert board.winner() == 1
@@ -0,0 +1,109 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from Checkpoint import LATEST_FILE, Checkpointer
+from PER.PrioritizedReplayBuffer import PrioritizedReplayBuffer
+
+class FakeAgent:
+    """The snapshot()/restore() interface of DQNAgent, over a real replay buffer and one array per weight group."""
+
+    def __init__(self, step=0):
+        self.memory = PrioritizedReplayBuffer(16)
+        self.weights = {group: [np.full(3, float(step))] for group in ("model", "target_model", "optimizer")}
+        self.step = step
+
+    def snapshot(self):
+        arrays, scalars = self.memory.snapshot()
+        return {group: [w.copy() for w in values] for group, values in self.weights.items()}, arrays, {**scalars, "training_step": self.step}
+
+    def restore(self, weights, arrays, scalars):
+        self.weights = weights
+        self.memory.restore(arrays, {key: value for key, value in scalars.items() if key != "training_step"})
+        self.step = scalars["training_step"]
+
+def save(checkpointer, step, episode):
+    checkpointer.save(FakeAgent(step), {"episode": episode})
+    checkpointer.wait()
+
+def checkpoints(directory):
+    return sorted(entry for entry in os.listdir(directory) if entry.startswith("step-"))
+
+def test_round_trip(tmp_path, transitions):
+    agent = FakeAgent(7)
+    agent.memory.store_batch(*transitions(20))
+    checkpointer = Checkpointer(str(tmp_path))
+    checkpointer.save(agent, {"episode": 3})
+    checkpointer.wait()
+
+    restored = FakeAgent()
+    assert Checkpointer(str(tmp_path)).load(restored) == {"episode": 3}
+    assert restored.step == 7 and restored.weights["model"][0].tolist() == [7.0] * 3
+    assert np.array_equal(restored.memory.states, agent.memory.states)
+    assert np.array_equal(restored.memory.tree.tree, agent.memory.tree.tree)
+
+def test_keeps_the_newest_of_its_own_checkpoints(tmp_path):
+    checkpointer = Checkpointer(str(tmp_path), keep=2)
+    for step in (10, 20, 30):
+        save(checkpointer, step, step)
+    assert checkpoints(str(tmp_path)) == ["step-000000020-episode-000000020", "step-000000030-episode-000000030"]
+
+def test_older_run_with_higher_steps_is_left_alone(tmp_path):
+    old_run = Checkpointer(str(tmp_path), keep=2)
+    for step in (5000, 6000):
+        save(old_run, step, step)
+    old = checkpoints(str(tmp_path))
+
+    # A fresh run in the same directory: its own checkpoints sort first by name, yet are the newest
+    new_run = Checkpointer(str(tmp_path), keep=2)
+    for step in (10, 20, 30):
+        save(new_run, step, step)
+        with open(os.path.join(str(tmp_path), LATEST_FILE)) as f:
+            assert os.path.isdir(os.path.join(str(tmp_path), f.read().strip()))
+    assert checkpoints(str(tmp_path)) == ["step-000000020-episode-000000020", "step-000000030-episode-000000030"] + old
+
+    restored = FakeAgent()
+    assert Checkpointer(str(tmp_path)).load(restored) == {"episode": 30} and restored.step == 30
+
+def test_resumed_checkpoint_goes_only_once_a_newer_one_is_published(tmp_path, transitions):
+    agent = FakeAgent(10)
+    agent.memory.store_batch(*transitions(20))
+    save_agent = Checkpointer(str(tmp_path))
+    save_agent.save(agent, {"episode": 10})
+    save_agent.wait()
+
+    resumed = Checkpointer(str(tmp_path), keep=1)
+    restored = FakeAgent()
+    resumed.load(restored) # The replay arrays are memory-mapped from the checkpoint
+    assert isinstance(restored.memory.states, np.memmap)
+    save(resumed, 20, 20)
+    assert checkpoints(str(tmp_path)) == ["step-000000020-episode-000000020"]
+    with open(os.path.join(str(tmp_path), LATEST_FILE)) as f:
+        assert f.read() == "step-000000020-episode-000000020"
+    # The mapping outlives the deleted files
+    assert np.array_equal(restored.memory.states, agent.memory.states)
+
+def test_failed_prune_is_reported_and_retried(tmp_path, monkeypatch, capsys):
+    checkpointer = Checkpointer(str(tmp_path), keep=1)
+    save(checkpointer, 10, 10)
+    rmtree = shutil.rmtree
+    def failing_rmtree(path, *args, **kwargs):
+        raise PermissionError(f"{path} is in use")
+    monkeypatch.setattr(shutil, "rmtree", failing_rmtree)
+    save(checkpointer, 20, 20)
+    assert "Could not delete old checkpoint step-000000010-episode-000000010" in capsys.readouterr().out
+    assert len(checkpoints(str(tmp_path))) == 2
+
+    monkeypatch.setattr(shutil, "rmtree", rmtree)
+    save(checkpointer, 30, 30)
+    assert checkpoints(str(tmp_path)) == ["step-000000030-episode-000000030"]
+
+def test_buffer_restore_checks_capacity(transitions):
+    buffer = PrioritizedReplayBuffer(16)
+    buffer.store_batch(*transitions(20))
+    arrays, scalars = buffer.snapshot()
+    restored = PrioritizedReplayBuffer(16)
+    restored.restore(arrays, scalars)
+    assert (restored.write, restored.count) == (buffer.write, buffer.count)
+    with pytest.raises(ValueError):
+        PrioritizedReplayBuffer(8).restore(arrays, scalars)
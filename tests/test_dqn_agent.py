@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+import tensorflow as tf
+from DQNAgent import DQNAgent
+
+def legacy_step(agent, states, actions, rewards, next_states, dones, is_weights):
+    """The training step before it was compiled: two predict calls, targets edited in a loop, then fit."""
+    targets = agent.model.predict(states, verbose=0)
+    next_q = agent.target_model.predict(next_states, verbose=0)
+    errors = np.zeros(len(states))
+    for i, (a, r, done) in enumerate(zip(actions, rewards, dones)):
+        target = r if done else r + agent.gamma * np.max(next_q[i])
+        errors[i] = abs(targets[i][a] - target)
+        targets[i][a] = target
+    agent.model.fit(states, targets, batch_size=len(states), sample_weight=is_weights, verbose=0)
+    return errors
+
+def test_compiled_step_matches_predict_and_fit():
+    rng = np.random.default_rng(0)
+    size = 64
+    states = rng.integers(0, 8, (size, 15)).astype(np.float32)
+    next_states = rng.integers(0, 8, (size, 15)).astype(np.float32)
+    actions = rng.integers(0, 6, size).astype(np.int32)
+    rewards = rng.normal(size=size).astype(np.float32)
+    dones = (rng.random(size) < 0.2).astype(np.float32)
+    is_weights = rng.random(size).astype(np.float32)
+
+    compiled, legacy = DQNAgent(15, 6), DQNAgent(15, 6)
+    # Different targets than online weights, so the Bellman targets are not trivially the online Q-values
+    legacy.model.set_weights(compiled.model.get_weights())
+    target_weights = [w * 0.5 for w in compiled.model.get_weights()]
+    compiled.target_model.set_weights(target_weights)
+    legacy.target_model.set_weights(target_weights)
+
+    errors = compiled._train_step(*(tf.constant(a) for a in (states, actions, rewards, next_states, dones, is_weights))).numpy()
+    expected = legacy_step(legacy, states, actions, rewards, next_states, dones, is_weights)
+    np.testing.assert_allclose(errors, expected, rtol=1e-5, atol=1e-5)
+    for new, old in zip(compiled.model.get_weights(), legacy.model.get_weights()):
+        np.testing.assert_allclose(new, old, rtol=1e-4, atol=1e-6)
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+from DQNAgent import DQNAgent
+from InferenceAgent import InferenceAgent
+
+
+def test_exported_weights_match_keras(tmp_path):
+    agent = DQNAgent(15, 6)
+    path = str(tmp_path / "agent.npz")
+    agent.export_weights(path)
+
+    states = np.random.default_rng(0).integers(0, 8, size=(64, 15)).astype(np.float32)
+    states[:, 14] = 0
+    expected = agent.model.predict(states, verbose=0)
+    np.testing.assert_allclose(InferenceAgent(path).q_values(states), expected, rtol=1e-5, atol=1e-5)
+
+    saved = np.load(path)
+    assert str(saved["input"]) == agent.model.layers[0].name
+    assert len(saved["layers"]) == sum(layer.__class__.__name__ == "Dense" for layer in agent.model.layers)
@@ -0,0 +1,29 @@
+import pytest
+from League import INITIAL_RATING, MAX_GAP_CHANGE, RANDOM_PLAYER, League
+
+@pytest.fixture
+def league(tmp_path):
+    league = League(str(tmp_path))
+    for name in ("a", "b"):
+        league._new_player(name, f"{name}.npz", None)
+    return league
+
+def test_empty_match_changes_nothing(league):
+    before = {name: dict(player) for name, player in league.state["players"].items()}
+    league._rate("a", "b", 0, 0, 0)
+    assert league.state["players"] == before
+
+def test_random_player_keeps_its_rating_even_when_records_are_equal(league):
+    # A player whose record equals the random player's field for field must still be told apart
+    league.state["players"]["a"] = dict(league.state["players"][RANDOM_PLAYER])
+    league._rate(RANDOM_PLAYER, "a", 10, 90, 0)
+    assert league.state["players"][RANDOM_PLAYER]["rating"] == INITIAL_RATING
+    assert INITIAL_RATING < league.state["players"]["a"]["rating"] <= INITIAL_RATING + MAX_GAP_CHANGE
+
+def test_match_moves_both_ratings_symmetrically(league):
+    league._rate("a", "b", 60, 30, 10)
+    a, b = league.state["players"]["a"], league.state["players"]["b"]
+    assert a["rating"] - INITIAL_RATING == pytest.approx(INITIAL_RATING - b["rating"]) and a["rating"] > INITIAL_RATING
+    assert (a["games"], a["wins"], a["losses"], a["ties"]) == (100, 60, 30, 10)
+    assert (b["wins"], b["losses"]) == (30, 60)
+    assert league.state["records"]["a|b"] == [60, 30, 10]
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from MancalaBoard import MancalaBoard
+from MCTS import MATERIAL_SCALE, MCTSSearch
+
+def flat(states):
+    """Evaluator whose Q-values say nothing: every move of every position is worth the same."""
+    return np.zeros((len(states), 6), dtype=np.float32)
+
+@pytest.mark.parametrize("player", [0, 1])
+def test_root_lead_is_not_counted_as_leaf_value(player):
+    # A big store lead at the root is no reason to value the position: only what the search gains counts
+    board = MancalaBoard([3, 3, 3, 3, 3, 3, 12, 1, 1, 1, 1, 1, 1, 0], player)
+    result = MCTSSearch(flat).search(board, simulations=0)
+    assert result.value == 0.0
+
+def test_leaf_values_follow_the_stores_gained_since_the_root():
+    search = MCTSSearch(flat)
+    board = MancalaBoard([3, 3, 3, 3, 3, 3, 12, 1, 1, 1, 1, 1, 1, 0], 0)
+    search.search(board, simulations=0)
+    gained = board.copy()
+    gained.pits[6] += 3 # Three more seeds for the root's mover, seen from either side to move
+    for player, sign in ((0, 1), (1, -1)):
+        node = type("Node", (), {})()
+        node.board = MancalaBoard(list(gained.pits), player)
+        search._expand(node, np.zeros(6))
+        assert node.value == pytest.approx(sign * np.tanh(3 / MATERIAL_SCALE))
+
+def test_search_ranks_every_move():
+    board = MancalaBoard([0, 2, 0, 5, 1, 0, 10, 4, 4, 0, 4, 4, 4, 8], 0)
+    result = MCTSSearch(flat, batch_size=8).search(board, simulations=200)
+    assert sorted(result.best_moves) == list(range(6))
+    assert set(result.best_moves[:3]) == {1, 3, 4} # The legal moves come first
+    assert result.simulations == 200
+    assert -1.0 <= result.value <= 1.0
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import protocol
+
+OPENING = [4, 4, 4, 4, 4, 4, 0, 4, 4, 4, 4, 4, 4, 0, 0]
+
+def test_decode_is_a_view_of_the_body():
+    boards = np.array([OPENING, OPENING[7:14] + OPENING[:7] + [1]], dtype=np.uint8)
+    decoded = protocol.decode_boards(boards.tobytes())
+    assert decoded.shape == (2, protocol.BOARD_BYTES)
+    np.testing.assert_array_equal(decoded, boards)
+    assert not decoded.flags.writeable
+
+def test_encode_moves_packs_six_bytes_per_board():
+    rankings = [[5, 4, 3, 2, 1, 0], [0, 1, 2, 3, 4, 5]]
+    body = protocol.encode_moves(rankings)
+    assert len(body) == 2 * protocol.MOVES_BYTES
+    assert np.frombuffer(body, dtype=np.uint8).reshape(-1, protocol.MOVES_BYTES).tolist() == rankings
+
+@pytest.mark.parametrize("body", [
+    b"",                                                 # No board
+    bytes(OPENING[:14]),                                 # Too short
+    bytes(OPENING) + b"\x00",                            # Trailing byte
+    bytes(OPENING[:14] + [2]),                           # No such player
+    bytes([4] * 6 + [0] + [4] * 6 + [1, 0]),             # 49 seeds
+    bytes([255] + [0] * 14),                             # Out of range
+])
+def test_malformed_bodies_are_rejected(body):
+    with pytest.raises(ValueError):
+        protocol.decode_boards(body)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from PER.PrioritizedReplayBuffer import PrioritizedReplayBuffer
+from PER.SumTree import SumTree
+
+@pytest.mark.parametrize("capacity", [1, 5, 8, 1000])
+def test_sums_and_lookups_match_a_linear_scan(capacity):
+    rng = np.random.default_rng(capacity)
+    tree = SumTree(capacity)
+    priorities = np.zeros(capacity)
+    for _ in range(20):
+        indices = rng.choice(capacity, size=rng.integers(1, capacity + 1), replace=False)
+        values = rng.random(len(indices)) * rng.choice([0, 1, 10], size=len(indices))
+        if rng.random() < 0.5:
+            tree.update(indices, values)
+        else:
+            for index, value in zip(indices, values):
+                tree.update_one(int(index), value)
+        priorities[indices] = values
+
+        assert tree.total_priority() == pytest.approx(priorities.sum())
+        assert np.array_equal(tree.priorities(np.arange(capacity)), priorities)
+        if priorities.sum() > 0:
+            # A value falls into the first leaf whose running sum reaches it; empty leaves are never returned
+            queries = rng.random(100) * priorities.sum()
+            found = tree.get(queries)
+            expected = np.minimum(np.searchsorted(np.cumsum(priorities), queries), capacity - 1)
+            assert np.array_equal(found, expected)
+            assert (priorities[found] > 0).all()
+
+def test_batched_and_single_updates_build_the_same_tree():
+    rng = np.random.default_rng(0)
+    batched, single = SumTree(37), SumTree(37)
+    indices, values = rng.integers(0, 37, 200), rng.random(200)
+    for index, value in zip(indices, values):
+        single.update_one(int(index), value)
+    last = {int(i): v for i, v in zip(indices, values)} # A batch with repeated indices keeps the last write
+    batched.update(list(last), list(last.values()))
+    assert np.allclose(batched.tree, single.tree)
+
+def test_store_batch_matches_store_across_the_wraparound(transitions):
+    single, batched = PrioritizedReplayBuffer(10), PrioritizedReplayBuffer(10)
+    states, actions, rewards, next_states, dones, priorities = transitions(25)
+    for i in range(25):
+        single.store((states[i], actions[i], rewards[i], next_states[i], dones[i]), priorities[i])
+    for start, end in ((0, 7), (7, 19), (19, 25)):
+        batched.store_batch(states[start:end], actions[start:end], rewards[start:end], next_states[start:end], dones[start:end], priorities[start:end])
+    for name in ("states", "actions", "rewards", "next_states", "dones"):
+        assert np.array_equal(getattr(single, name), getattr(batched, name))
+    assert np.allclose(single.tree.tree, batched.tree.tree)
+    assert (single.write, single.count) == (batched.write, batched.count) == (5, 10)
+
+def test_sample_returns_stored_rows_with_importance_weights(transitions):
+    buffer = PrioritizedReplayBuffer(64)
+    states, actions, rewards, next_states, dones, priorities = transitions(40)
+    buffer.store_batch(states, actions, rewards, next_states, dones, priorities)
+    np.random.seed(0)
+    (s, a, r, ns, d), indices, weights = buffer.sample(16, beta=0.5)
+    assert (indices < 40).all()
+    assert np.array_equal(s, states[indices]) and np.array_equal(a, actions[indices]) and np.array_equal(d, dones[indices])
+    probabilities = (priorities[indices] + buffer.epsilon) ** buffer.alpha / buffer.tree.total_priority()
+    assert np.allclose(weights, (probabilities * 40) ** -0.5)
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import protocol
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, "public", "assets", "mancala_agent_final.onnx")
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason="needs the exported ONNX model")
+
+OPENING = [4, 4, 4, 4, 4, 4, 0, 4, 4, 4, 4, 4, 4, 0, 0]
+
+@pytest.fixture(scope="module")
+def client():
+    os.environ.setdefault("MODEL_PATH", MODEL)
+    os.environ.setdefault("SEARCH_TIME_MS", "20")
+    import main
+    return TestClient(main.app)
+
+def baseline_moves(states):
+    """The original server's answer: for seat 0 the halves are swapped and the seat value kept, then the model ranks."""
+    import onnxruntime as ort
+    session = ort.InferenceSession(MODEL)
+    rows = []
+    for state in states:
+        state = list(state)
+        if state[-1] == 0:
+            state = state[7:14] + state[0:7] + [0]
+        q_values = session.run(None, {session.get_inputs()[0].name: np.array([state], dtype=np.float32)})[0][0]
+        rows.append(np.argsort(q_values)[::-1].tolist())
+    return rows
+
+def frontend_states(count, seat, seed):
+    """Random boards as the frontend sends them: the agent's pits at 7-12, at least one of them holding seeds."""
+    rng = np.random.default_rng(seed)
+    states = []
+    while len(states) < count:
+        pits = rng.integers(0, 6, 14)
+        if pits.sum() <= 48 and pits[7:13].any():
+            states.append(pits.tolist() + [seat])
+    return states
+
+@pytest.mark.parametrize("mode", ["fast", "strong"])
+def test_best_move_ranks_all_six_moves(client, mode):
+    response = client.post("/best_move/", json={"state": OPENING, "mode": mode})
+    assert response.status_code == 200
+    assert sorted(response.json()["best_moves"]) == list(range(6))
+
+@pytest.mark.parametrize("state", [
+    [-1] * 14 + [1],                      # Negative pits
+    [4] * 6 + [0] + [4] * 6 + [1, 0],     # 49 seeds
+    [255] + [0] * 13 + [0],               # Out of range
+    OPENING[:14] + [2],                   # No such player
+    OPENING[:14] + [True],                # Not a number
+    OPENING[:13] + ["4", 0],
+    OPENING[:13] + [0.5, 0],
+    OPENING[:14],                         # Wrong length
+])
+@pytest.mark.parametrize("mode", ["fast", "strong"])
+def test_invalid_states_are_rejected(client, state, mode):
+    response = client.post("/best_move/", json={"state": state, "mode": mode})
+    assert response.status_code == 400, response.text
+
+def test_invalid_state_in_a_batch_is_rejected(client):
+    response = client.post("/best_moves/batch/", json={"states": [OPENING, [-1] * 14 + [1]]})
+    assert response.status_code == 400
+
+def test_binary_endpoints_match_json(client):
+    states = [OPENING, [0, 5, 5, 5, 5, 4, 0, 4, 4, 4, 4, 4, 4, 0, 1], [3, 0, 6, 1, 0, 2, 10, 1, 4, 0, 7, 2, 1, 11, 0]]
+    single = client.post("/best_move/binary/", content=bytes(states[0]), headers={"Content-Type": protocol.MEDIA_TYPE})
+    assert single.status_code == 200
+    assert list(single.content) == client.post("/best_move/", json={"state": states[0]}).json()["best_moves"]
+
+    batch = client.post("/best_moves/batch/binary/", content=b"".join(bytes(s) for s in states))
+    assert batch.status_code == 200
+    expected = client.post("/best_moves/batch/", json={"states": states}).json()["best_moves"]
+    assert np.frombuffer(batch.content, dtype=np.uint8).reshape(-1, protocol.MOVES_BYTES).tolist() == expected
+
+@pytest.mark.parametrize("body", [bytes(OPENING[:14]), bytes(OPENING[:14] + [2]), bytes([4] * 6 + [0] + [4] * 6 + [1, 0])])
+def test_malformed_binary_boards_are_rejected(client, body):
+    assert client.post("/best_move/binary/", content=body).status_code == 400
+    assert client.post("/best_moves/batch/binary/", content=body).status_code == 400
+
+@pytest.mark.parametrize("seat", [0, 1])
+def test_answers_match_the_original_encoding(client, seat):
+    # Seat 0 (the agent started) is the frontend's board with the halves swapped, not the canonical form
+    states = frontend_states(50, seat, seed=10 + seat)
+    expected = baseline_moves(states)
+    assert [client.post("/best_move/", json={"state": state}).json()["best_moves"] for state in states] == expected
+    assert client.post("/best_moves/batch/", json={"states": states}).json()["best_moves"] == expected
+    batch = client.post("/best_moves/batch/binary/", content=b"".join(bytes(s) for s in states))
+    assert np.frombuffer(batch.content, dtype=np.uint8).reshape(-1, protocol.MOVES_BYTES).tolist() == expected
+
+@pytest.mark.parametrize("mode", ["strong", "mcts"])
+@pytest.mark.parametrize("seat", [0, 1])
+def test_searches_play_the_agents_pits(client, mode, seat):
+    # The agent (pits 7-12) can only play its last pit, local move 5
+    state = [1, 2, 3, 4, 5, 6, 10, 0, 0, 0, 0, 0, 9, 7, seat]
+    assert client.post("/best_move/", json={"state": state, "mode": mode}).json()["best_moves"][0] == 5
+
+def test_seed_cap_applies_only_to_client_boards(client):
+    import main
+    # The shared engine's capture rule counts some seeds twice, so the server's own boards can hold more than 48
+    state = [4] * 6 + [5] + [4] * 6 + [1, 1]
+    assert client.post("/best_move/", json={"state": state}).status_code == 400
+    assert main.prepare_state(state, external=False)[0] == state
+
+def play_game(client, rng, query):
+    """Plays a whole WebSocket game with random human moves. Returns the final state message."""
+    with client.websocket_connect(f"/ws/game/?{query}") as websocket:
+        while True:
+            message = websocket.receive_json()
+            assert message["type"] != "error", message
+            if message["type"] == "move":
+                continue
+            if message["done"]:
+                return message
+            assert message["to_move"] == "human" and message["legal_moves"]
+            websocket.send_json({"move": int(rng.choice(message["legal_moves"]))})
+
+@pytest.mark.parametrize("query", ["mode=fast", "mode=fast&agent_first=true", "mode=strong"])
+def test_websocket_games_play_to_the_end(client, query):
+    rng = np.random.default_rng(7)
+    for _ in range(10 if "fast" in query else 3):
+        final = play_game(client, rng, query)
+        assert final["winner"] in ("human", "agent", "tie") and final["legal_moves"] == []
+
+@pytest.fixture
+def endgame_tablebase(client, tmp_path, monkeypatch):
+    import main
+    from EndgameTablebase import EndgameTablebase, generate
+    path = str(tmp_path / "tablebase.bin")
+    generate(path, 5, workers=1)
+    tablebase = EndgameTablebase(path)
+    monkeypatch.setattr(main, "tablebase", tablebase)
+    yield tablebase
+    tablebase.close()
+
+def test_batches_answer_endgames_from_the_tablebase(client, endgame_tablebase):
+    from MancalaBoard import MancalaBoard
+    from Symmetry import agent_view
+    rng = np.random.default_rng(3)
+    states = []
+    for seat in (0, 1):
+        while len(states) < 10 * (seat + 1):
+            pits = [0] * 14
+            for _ in range(5):
+                pits[int(rng.choice([0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12]))] += 1
+            pits[6] = int(rng.integers(0, 44))
+            pits[13] = 43 - pits[6]
+            if any(pits[7:13]):
+                states.append(pits + [seat])
+    expected = [endgame_tablebase.best_moves(MancalaBoard.from_state(agent_view(state))) for state in states]
+    assert [client.post("/best_move/", json={"state": state}).json()["best_moves"] for state in states] == expected
+    assert client.post("/best_moves/batch/", json={"states": states}).json()["best_moves"] == expected
+    batch = client.post("/best_moves/batch/binary/", content=b"".join(bytes(s) for s in states))
+    assert np.frombuffer(batch.content, dtype=np.uint8).reshape(-1, protocol.MOVES_BYTES).tolist() == expected
+
+@pytest.mark.parametrize("mode, search", [("strong", "search_best_moves"), ("mcts", "mcts_best_moves")])
+def test_searches_run_apart_from_inference(client, monkeypatch, mode, search):
+    import threading
+    import main
+    threads = []
+    run = getattr(main, search)
+    def recording_search(*args):
+        threads.append(threading.current_thread().name)
+        return run(*args)
+    monkeypatch.setattr(main, search, recording_search)
+    assert client.post("/best_move/", json={"state": OPENING, "mode": mode}).status_code == 200
+    assert threads and all(name.startswith("search") for name in threads)
@@ -0,0 +1,15 @@
+import pytest
+from sessions import GameSession
+
+@pytest.mark.parametrize("pit", [True, False, 1.0, "1", None, 6, 7, -1])
+def test_invalid_pits_change_nothing(pit):
+    session = GameSession()
+    before = session.state()
+    assert not session.play(pit)
+    assert session.state() == before and session.moves == 0
+
+def test_legal_pit_is_played():
+    session = GameSession()
+    assert session.play(2)
+    assert session.moves == 1
+    assert session.state()[6] == 1 # The last seed lands in the store
@@ -0,0 +1,61 @@
+import numpy as np
+from MancalaBoard import MancalaBoard
+from Symmetry import CANONICAL_PLAYER, agent_view, board_action, canonical_key, canonical_state, canonical_states, local_action, swap_sides, with_swapped
+
+def random_states(count, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, 8, (count, 15))
+    states[:, 14] = rng.integers(0, 2, count)
+    return states
+
+def test_swap_sides_is_an_involution():
+    states = random_states(200)
+    swapped = swap_sides(states)
+    assert np.array_equal(swap_sides(swapped), states)
+    assert np.array_equal(swapped[:, :7], states[:, 7:14]) and np.array_equal(swapped[:, 7:14], states[:, :7])
+    assert np.array_equal(swapped[:, 14], 1 - states[:, 14])
+    assert np.array_equal(swap_sides(states[0]), swapped[0]) # One state works as a batch of one
+
+def test_canonical_forms_agree():
+    states = random_states(200, seed=1)
+    canonical = canonical_states(states)
+    assert (canonical[:, 14] == CANONICAL_PLAYER).all()
+    assert np.array_equal(canonical_states(swap_sides(states)), canonical) # Both chairs share one form
+    for state, expected in zip(states, canonical):
+        assert canonical_state(state) == expected.tolist()
+        assert canonical_states(state).tolist() == expected.tolist()
+        board, twin = MancalaBoard.from_state(state), MancalaBoard.from_state(swap_sides(state))
+        assert canonical_key(board) == canonical_key(twin) == MancalaBoard.from_state(expected).key()
+
+def test_canonical_batch_is_not_copied_when_already_canonical():
+    states = random_states(10)
+    states[:, 14] = CANONICAL_PLAYER
+    assert canonical_states(states) is states
+
+def test_twins_play_the_same_game():
+    rng = np.random.default_rng(2)
+    for state in random_states(300, seed=3):
+        board, twin = MancalaBoard.from_state(state), MancalaBoard.from_state(swap_sides(state))
+        if board.side_empty():
+            continue
+        local = local_action(int(rng.choice(board.legal_moves())), board.player)
+        assert board.play(board_action(local, board.player)) == twin.play(board_action(local, twin.player))
+        assert twin.key() == MancalaBoard.from_state(swap_sides(list(board.pits) + [board.player])).key()
+
+def test_with_swapped_doubles_the_batch():
+    states, next_states = random_states(8), random_states(8, seed=4)
+    actions, rewards, dones = np.arange(8) % 6, np.linspace(-1, 1, 8), np.arange(8) % 3 == 0
+    out_states, out_actions, out_rewards, out_next, out_dones = with_swapped(states, actions, rewards, next_states, dones)
+    assert [len(a) for a in (out_states, out_actions, out_rewards, out_next, out_dones)] == [16] * 5
+    assert np.array_equal(out_states[8:], swap_sides(states)) and np.array_equal(out_next[8:], swap_sides(next_states))
+    assert np.array_equal(out_actions[8:], actions) and np.array_equal(out_rewards[8:], rewards) and np.array_equal(out_dones[8:], dones)
+
+def test_agent_view_swaps_seat_zero_boards_and_keeps_the_seat():
+    states = random_states(100, seed=5)
+    view = agent_view(states)
+    seat_zero = states[:, 14] == 0
+    assert np.array_equal(view[seat_zero, :7], states[seat_zero, 7:14]) and np.array_equal(view[seat_zero, 7:14], states[seat_zero, :7])
+    assert np.array_equal(view[~seat_zero], states[~seat_zero])
+    assert np.array_equal(view[:, 14], states[:, 14])
+    assert np.array_equal(agent_view(view), states)
+    assert np.array_equal(agent_view(states[0]), view[0])
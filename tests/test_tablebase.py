@@ -0,0 +1,78 @@
+import functools
+import numpy as np
+import pytest
+from AlphaBeta import AlphaBetaSearch
+from EndgameTablebase import EndgameTablebase, generate
+from MancalaBoard import MancalaBoard
+from Symmetry import swap_sides
+
+MAX_SEEDS = 5
+
+@pytest.fixture(scope="module")
+def tablebase(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tablebase") / "tablebase.bin")
+    generate(path, MAX_SEEDS, workers=2)
+    tablebase = EndgameTablebase(path)
+    yield tablebase
+    tablebase.close()
+
+@functools.lru_cache(maxsize=None)
+def solve(pits, player):
+    """Exact final store difference for the side to move, by searching the whole game tree."""
+    board = MancalaBoard(pits, player)
+    if board.side_empty():
+        board.sweep()
+        diff = board.pits[6] - board.pits[13]
+        return diff if player == 0 else -diff
+    best = None
+    for move in board.legal_moves():
+        child = board.copy()
+        extra_turn, _ = child.play(move)
+        score = solve(tuple(child.pits), child.player)
+        score = score if extra_turn else -score
+        best = score if best is None else max(best, score)
+    return best
+
+def endgame_positions(seed, count):
+    """Random positions with at most MAX_SEEDS seeds left in the pits and the rest of the 48 in the stores."""
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        pits = [0] * 14
+        for _ in range(rng.integers(1, MAX_SEEDS + 1)):
+            pits[rng.choice([0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11, 12])] += 1
+        pits[6] = int(rng.integers(0, 48 - sum(pits) + 1))
+        pits[13] = 48 - sum(pits)
+        yield MancalaBoard(pits, int(rng.integers(2)))
+
+def test_final_scores_match_a_full_search(tablebase):
+    for board in endgame_positions(0, 500):
+        assert tablebase.covers(board)
+        assert tablebase.final_score(board) == solve(tuple(board.pits), board.player)
+
+def test_side_swapped_twins_share_their_value(tablebase):
+    for board in endgame_positions(1, 200):
+        twin = swap_sides(list(board.pits) + [board.player])
+        assert tablebase.value(MancalaBoard.from_state(twin)) == tablebase.value(board)
+
+def test_best_move_is_optimal(tablebase):
+    for board in endgame_positions(2, 300):
+        if board.side_empty():
+            assert tablebase.best_moves(board) is None
+            continue
+        best = tablebase.best_moves(board)[0] + 7 * board.player
+        child = board.copy()
+        extra_turn, _ = child.play(best)
+        score = solve(tuple(child.pits), child.player)
+        assert (score if extra_turn else -score) == solve(tuple(board.pits), board.player)
+
+def test_positions_with_more_seeds_are_not_covered(tablebase):
+    board = MancalaBoard([1] * 6 + [21] + [0] * 6 + [21], 0)
+    assert not tablebase.covers(board)
+    assert tablebase.value(board) is None and tablebase.best_moves(board) is None
+
+def test_search_scores_covered_positions_exactly(tablebase):
+    engine = AlphaBetaSearch(tablebase=tablebase)
+    for board in endgame_positions(3, 50):
+        if board.side_empty():
+            continue
+        assert engine.search(board, max_depth=2).score == AlphaBetaSearch._proven(tablebase.final_score(board))
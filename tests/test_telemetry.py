@@ -0,0 +1,37 @@
+import os
+from types import SimpleNamespace
+import numpy as np
+from Telemetry import COLUMNS, TrainingTelemetry, read_log
+
+def fake_agent():
+    memory = SimpleNamespace(size=lambda: 10, tree=SimpleNamespace(total_priority=lambda: 5.0))
+    return SimpleNamespace(epsilon=0.5, beta=0.4, training_step=0, memory=memory)
+
+def write_log(path, episodes):
+    telemetry = TrainingTelemetry(path, flush_every=10, report=False)
+    agent = fake_agent()
+    for episode in range(1, episodes + 1):
+        telemetry.record_episode(episode, 1.0, episode % 2, 0, agent)
+    telemetry.close()
+
+def column_rows(path):
+    return {name: os.path.getsize(os.path.join(path, f"{name}.bin")) // np.dtype(dtype).itemsize for name, dtype in COLUMNS}
+
+def test_resume_drops_rows_after_the_checkpoint(tmp_path):
+    write_log(str(tmp_path), 30)
+    telemetry = TrainingTelemetry(str(tmp_path), flush_every=10, report=False, resume_rows=20)
+    telemetry.close()
+    assert set(column_rows(str(tmp_path)).values()) == {20}
+    assert read_log(str(tmp_path))["episode"].tolist() == list(range(1, 21))
+    assert telemetry.totals["wins"] + telemetry.totals["losses"] + telemetry.totals["ties"] == 20
+
+def test_resume_never_grows_a_column(tmp_path, capsys):
+    write_log(str(tmp_path), 20)
+    # A partly flushed log: one column lost its last rows
+    with open(os.path.join(str(tmp_path), "reward.bin"), "r+b") as f:
+        f.truncate(15 * np.dtype(np.float32).itemsize)
+    telemetry = TrainingTelemetry(str(tmp_path), flush_every=10, report=False, resume_rows=30)
+    telemetry.close()
+    assert set(column_rows(str(tmp_path)).values()) == {15}
+    assert "holds 15 of the checkpoint's 30 episodes" in capsys.readouterr().out
+    assert read_log(str(tmp_path))["episode"].tolist() == list(range(1, 16))
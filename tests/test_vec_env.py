@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from MancalaEnv import MancalaEnv
+from VecMancalaEnv import VecMancalaEnv
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_mancala_env_move_for_move(seed, num_envs=64, steps=1_500):
+    """The same moves in VecMancalaEnv and in one MancalaEnv per game give the same states, rewards and validity."""
+    rng = np.random.default_rng(seed)
+    positions = np.arange(num_envs) % 2
+    vec_env = VecMancalaEnv(num_envs, agent_position=positions)
+    envs = [MancalaEnv(int(p)) for p in positions]
+
+    for step in range(steps):
+        actions = vec_env.sample_actions(rng)
+        # Now and then an arbitrary pit instead, so invalid moves are compared as well
+        arbitrary = rng.random(num_envs) < 0.05
+        actions[arbitrary] = rng.integers(-1, 15, size=arbitrary.sum())
+
+        states, rewards, dones, valid = vec_env.step(actions)
+        for i, env in enumerate(envs):
+            ok, reward = env.make_move(int(actions[i]))
+            actual = vec_env.terminal_states[i] if dones[i] else states[i]
+            assert ok == valid[i], f"step {step}, game {i}"
+            assert reward == pytest.approx(rewards[i]), f"step {step}, game {i}"
+            assert env.done == dones[i], f"step {step}, game {i}"
+            assert np.array_equal(env.get_state(), actual), f"step {step}, game {i}"
+            if env.done:
+                env.reset()
+
+def test_sampled_actions_are_legal():
+    rng = np.random.default_rng(0)
+    vec_env = VecMancalaEnv(256)
+    for _ in range(200):
+        actions = vec_env.sample_actions(rng)
+        has_move = vec_env.legal_mask().any(axis=1)
+        pits = vec_env.boards[vec_env.rows, actions]
+        assert (actions // 7 == vec_env.current_player).all()
+        assert (pits[has_move] > 0).all()
+        assert vec_env.step(actions)[3].all()